@@ -1,125 +1,177 @@
 import streamlit as st
-from openai import OpenAI
-import openai
-import re
+import copy
+import hashlib
+import html
 import os
-
-# Load API key from environment variable
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from cache import CompletionCache
+from catalog import DEFAULT_CATALOG_PATH, Catalog, source_signature
+from chat import ChatLog, ChatMessage, RenderedTranscript, Role
+from context import ConversationContext
+from insights import parse_insights_report
+from jobs import DONE, FAILED, JobQueue
+from llm import LLMClient, estimate_tokens
+from negotiation import (
+    SYSTEM_PROMPT, VENDOR_FALLBACK_REPLY, build_strategy_prompt, detect_vendor_offer, generate_insights_report,
+    generate_vendor_quote, generate_vendor_response, polish_vendor_quote, refresh_negotiation_summary,
+    render_opening_quote, stream_strategy_suggestion, stream_vendor_quote, stream_vendor_response,
+    update_conversation_context
+)
+from pricing import extract_buyer_offer
+from reply_cache import VendorReplyCache
+from store import NegotiationStore, new_negotiation_id
+from structured import StrategySuggestion, VendorReply
+from trajectory import OfferTrajectory
+from vendor_engine import VendorEngine
+
+# Load API key from environment variable. A missing key doesn't stop the app from starting (health
+# checks, practice mode and offline tests still work); LLM calls fail and fall back instead
 openai_api_key = os.getenv("OPENAI_API_KEY")
+missing_api_key = not openai_api_key and os.getenv("LLM_BACKEND", "openai").lower() != "fake"
+
+# One pooled, rate-limited client shared by every session in this process; the OpenAI SDK
+# itself is only imported on the first LLM call
+@st.cache_resource
+def get_llm_client():
+    return LLMClient.from_env(api_key=openai_api_key)
+
+client = get_llm_client()
+
+# Shared on-disk cache for deterministic reports, reused across sessions and restarts
+@st.cache_resource
+def get_completion_cache():
+    return CompletionCache.from_env()
+
+completion_cache = get_completion_cache()
+
+# Process-wide worker pool for running independent LLM calls concurrently
+@st.cache_resource
+def get_executor():
+    return ThreadPoolExecutor(max_workers=int(os.getenv("LLM_WORKERS", "8")), thread_name_prefix="llm")
+
+executor = get_executor()
+
+# Durable negotiation records (turns, offers, insights, summaries) shared by every session
+@st.cache_resource
+def get_negotiation_store():
+    return NegotiationStore.from_env()
+
+negotiation_store = get_negotiation_store()
+
+# Earlier negotiations with a vendor for the purchase history panel; briefly cached so reruns
+# with the insights panel open don't query the store every time
+PURCHASE_HISTORY_TTL_SECONDS = float(os.getenv("PURCHASE_HISTORY_TTL_SECONDS", "30"))
+
+@st.cache_data(ttl=PURCHASE_HISTORY_TTL_SECONDS, max_entries=1000)
+def previous_negotiations(vendor, exclude_id):
+    return negotiation_store.previous_negotiations(vendor, exclude_id=exclude_id)
+
+# Reuse vendor replies for near-identical buyer messages in the same negotiation state
+VENDOR_REPLY_CACHE = os.getenv("VENDOR_REPLY_CACHE", "false").lower() in ("1", "true", "yes")
+
+@st.cache_resource
+def get_reply_cache():
+    return VendorReplyCache.from_env() if VENDOR_REPLY_CACHE else None
 
-if not openai_api_key:
-    raise ValueError("OPENAI_API_KEY environment variable is not set.")
+reply_cache = get_reply_cache()
 
-client = openai.OpenAI(api_key=openai_api_key)
+# Local vendor negotiation engine: "fallback" (stands in for failed LLM calls), "practice" (answers
+# every turn locally, no LLM) or "hybrid" (decides the price; the LLM only words the reply)
+@st.cache_resource
+def get_vendor_engine():
+    return VendorEngine.from_env()
+
+vendor_engine = get_vendor_engine()
+
+# Stream vendor replies token by token (set STREAM_VENDOR_REPLIES=false to wait for full completions)
+STREAM_VENDOR_REPLIES = os.getenv("STREAM_VENDOR_REPLIES", "true").lower() not in ("0", "false", "no")
+
+# How often (seconds) pages poll running background jobs for progress
+JOB_POLL_SECONDS = float(os.getenv("JOB_POLL_SECONDS", "0.3"))
+
+# Start the opening quote and insights in the background as soon as selections are complete
+SPECULATIVE_PREFETCH = os.getenv("SPECULATIVE_PREFETCH", "false").lower() in ("1", "true", "yes")
+
+# Generate the next strategy suggestion in the background as soon as a vendor reply lands, spending
+# at most SPECULATIVE_STRATEGY_TOKEN_BUDGET (estimated) tokens per session on speculation
+SPECULATIVE_STRATEGY = os.getenv("SPECULATIVE_STRATEGY", "false").lower() in ("1", "true", "yes")
+SPECULATIVE_STRATEGY_TOKEN_BUDGET = int(os.getenv("SPECULATIVE_STRATEGY_TOKEN_BUDGET", "20000"))
+
+# Opening quote: "template" (instant, no LLM), "polish" (instant template, swapped for an LLM rewrite
+# if it arrives within OPENING_POLISH_BUDGET_SECONDS) or "llm" (streamed from the model)
+OPENING_QUOTE_MODE = os.getenv("OPENING_QUOTE_MODE", "polish").lower()
+OPENING_POLISH_BUDGET_SECONDS = float(os.getenv("OPENING_POLISH_BUDGET_SECONDS", "2.5"))
+if vendor_engine.mode == "practice":
+    OPENING_QUOTE_MODE = "template"
+
+# Show the LLM latency / token / cost panel in the sidebar
+SHOW_METRICS_PANEL = os.getenv("SHOW_METRICS_PANEL", "false").lower() in ("1", "true", "yes")
+
+ASSETS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "assets")
+
+# Page stylesheet, read from disk once per process
+@st.cache_data
+def load_stylesheet(path=os.path.join(ASSETS_DIR, "app.css")):
+    with open(path, encoding="utf-8") as f:
+        return f"<style>\n{f.read()}</style>"
 
 st.set_page_config(layout="wide")
 st.markdown("## 🤝 Buyer / Procurement Support Agent")
+if missing_api_key and vendor_engine.mode == "practice":
+    # Practice mode plays the vendor locally; insights, strategy suggestions and summaries still call the LLM
+    st.warning(
+        "⚠️ OPENAI_API_KEY environment variable is not set. The vendor runs locally in practice mode, but "
+        "market insights, strategy suggestions and summaries need the key and will fail until it is set."
+    )
+elif missing_api_key:
+    st.warning(
+        "⚠️ OPENAI_API_KEY environment variable is not set. AI features will fail until it is; "
+        "set VENDOR_ENGINE_MODE=practice to negotiate against the local vendor engine."
+    )
 
 # Custom CSS for chat alignment and price display
-st.markdown("""
-<style>
-.vendor-message {
-    background-color: #f0f2f6;
-    padding: 10px;
-    border-radius: 10px;
-    margin: 10px 0;
-    border-left: 4px solid #ff6b35;
-}
-
-.buyer-message {
-    background-color: #e8f4fd;
-    padding: 10px;
-    border-radius: 10px;
-    margin: 10px 0;
-    margin-left: 20%;
-    border-right: 4px solid #1f77b4;
-    text-align: right;
-}
-
-.ai-suggestion {
-    background-color: #f8f9fa;
-    padding: 10px;
-    border-radius: 10px;
-    margin: 10px 0;
-    border-left: 4px solid #28a745;
-}
-
-.price-banner {
-    background: linear-gradient(90deg, #667eea 0%, #764ba2 100%);
-    color: white;
-    padding: 15px;
-    border-radius: 10px;
-    margin: 10px 0;
-    text-align: center;
-    font-weight: bold;
-}
-
-.current-offer {
-    background-color: #ffeaa7;
-    padding: 10px;
-    border-radius: 8px;
-    margin: 5px 0;
-    border-left: 4px solid #fdcb6e;
-}
-</style>
-""", unsafe_allow_html=True)
-
-# Define brand and product mapping with sample prices
-BRAND_PRODUCTS = {
-    "Apple": {
-        "MacBook": 1500,
-        "iMac": 1800,
-        "iPad": 600,
-        "iPhone": 1000,
-        "Accessories": 100
-    },
-    "Microsoft": {
-        "Surface": 1300,
-        "Office 365": 150,
-        "Azure Services": 500,
-        "Teams License": 80,
-        "Windows License": 200
-    },
-    "P&G": {
-        "Detergent": 12, 
-        "Shampoo" : 3, 
-        "Toothpaste" : 1.50, 
-        "Shavers" : 80, 
-        "Cleaning Products" : 4 
-        },
-    "Unilever": {
-        "Soap": 0.80, 
-        "Ice Cream" : 3.50,
-        "Tea" : 3,
-        "Personal Care": 2,
-        "Household Products": 2.50
-        },
-    "Danone": {
-        "Activa Youghurt": 2.98,
-        "Alpro Barista": 4.75,
-        "Danone Water": 39.70
-    },
-    "Black & Decker": {
-        "Cordless Handheld Vacuum": 54.99,
-        "Steam Mops 365": 99,
-        "PowerConnect Batteries": 56.99
-    },
-    "Newell Brands": {
-        "Rubbermaid Kitchen Containers": 38.36,
-        "Scented Candles": 16.88,
-        "Sharpie Marker packs": 10
-    }
-}
+st.markdown(load_stylesheet(), unsafe_allow_html=True)
+
+# Brand/product catalog: an SQLite index built from CATALOG_PATH (CSV or Parquet), reopened
+# whenever the source file's size or mtime changes
+CATALOG_PAGE_SIZE = int(os.getenv("CATALOG_PAGE_SIZE", "50"))
+
+@st.cache_resource(max_entries=1)
+def get_catalog(signature):
+    return Catalog.from_env()
+
+catalog_signature = source_signature(os.getenv("CATALOG_PATH", DEFAULT_CATALOG_PATH))
+
+# One page of brand names (or `brand`'s products) matching `prefix`, with the total match count
+@st.cache_data(max_entries=1000)
+def catalog_page(signature, brand, prefix, page):
+    catalog = get_catalog(signature)
+    offset = (page - 1) * CATALOG_PAGE_SIZE
+    if brand is None:
+        return catalog.brands(prefix, offset, CATALOG_PAGE_SIZE), catalog.brand_count(prefix)
+    return catalog.products(brand, prefix, offset, CATALOG_PAGE_SIZE), catalog.product_count(brand, prefix)
+
+@st.cache_data(max_entries=1000)
+def catalog_price(signature, brand, product):
+    return get_catalog(signature).price(brand, product)
+
+# Whether `name` is a brand (brand None) or one of `brand`'s products
+@st.cache_data(max_entries=1000)
+def catalog_contains(signature, brand, name):
+    if brand is None:
+        return get_catalog(signature).has_brand(name)
+    return catalog_price(signature, brand, name) is not None
 
 # Initialize session state variables
+# Negotiation transcript; old turns beyond CHAT_MAX_MESSAGES move to an on-disk archive
 if 'chat3_history' not in st.session_state:
-    st.session_state.chat3_history = [
-        {"role": "system", "content": (
-            "You are an AI negotiation strategist. The chat involves a buyer and a vendor. "
-            "Your job is to analyze the conversation and occasionally provide strategic suggestions "
-            "to the buyer to improve negotiation outcomes."
-        )}
-    ]
+    st.session_state.chat3_history = ChatLog.from_env(SYSTEM_PROMPT)
+
+# Escaped chat-bubble HTML for the transcript, extended as turns arrive
+if 'transcript_html' not in st.session_state:
+    st.session_state.transcript_html = RenderedTranscript()
 
 if 'draft_strategy' not in st.session_state:
     st.session_state.draft_strategy = None
@@ -139,120 +191,435 @@ if 'market_insights' not in st.session_state:
 if 'current_vendor_offer' not in st.session_state:
     st.session_state.current_vendor_offer = None
 
+# Background LLM jobs for this session (vendor turn, strategy, summary, insights, prefetches)
+if 'jobs' not in st.session_state:
+    st.session_state.jobs = JobQueue(executor)
+
+# Error left by a failed job, by slot: (st.error / st.warning, message), shown on the next run
+if 'job_errors' not in st.session_state:
+    st.session_state.job_errors = {}
+
+# Token-budgeted rolling summary + recent turns used by the vendor, strategy and summary prompts
+if 'conversation_context' not in st.session_state:
+    st.session_state.conversation_context = ConversationContext.from_env()
+
+# Latest negotiation summary and how many history entries it covers
+if 'negotiation_summary' not in st.session_state:
+    st.session_state.negotiation_summary = None
+
+# Estimated tokens spent on speculative strategies, and the conversation state last speculated on
+if 'strategy_speculation_tokens' not in st.session_state:
+    st.session_state.strategy_speculation_tokens = 0
+
+if 'strategy_speculated_key' not in st.session_state:
+    st.session_state.strategy_speculated_key = None
+
+# ID of this negotiation in the store (also kept in the URL as ?negotiation=<id>)
+if 'negotiation_id' not in st.session_state:
+    st.session_state.negotiation_id = None
+
+# Every price stated by either side, with running concession statistics
+if 'offer_trajectory' not in st.session_state:
+    st.session_state.offer_trajectory = None
+
+# Function to restore a stored negotiation into a fresh session; runs before any widget is created
+def resume_negotiation(negotiation_id):
+    record = negotiation_store.load(negotiation_id)
+    if record is None or catalog_price(catalog_signature, record["vendor"], record["product"]) is None:
+        return False
+    history = ChatLog.from_env(SYSTEM_PROMPT)
+    for message in record["turns"]:
+        history.append(message.role, message.text, message.speaker)
+    st.session_state.vendor_select = record["vendor"]
+    st.session_state.product_select = record["product"]
+    st.session_state.quoted_price_input = float(record["quoted_price"])
+    st.session_state.chat3_history = history
+    st.session_state.negotiation_id = negotiation_id
+    st.session_state.current_vendor_offer = record["current_offer"]
+    st.session_state.negotiation_started = bool(record["turns"])
+    st.session_state.vendor_auto_responded = bool(record["turns"])
+    st.session_state.negotiation_summary = record["summary"]
+    trajectory = OfferTrajectory(record["quoted_price"])
+    for idx, role, offer, created_at in record["offers"]:
+        trajectory.append(idx, role, offer, created_at)
+    st.session_state.offer_trajectory = trajectory
+    if record["insights"]:
+        st.session_state.market_insights = parse_insights_report(record["insights"])
+    return True
+
+if 'resume_checked' not in st.session_state:
+    st.session_state.resume_checked = True
+    requested_id = st.query_params.get("negotiation")
+    if requested_id and not resume_negotiation(requested_id):
+        del st.query_params["negotiation"]
+
+# Function to add a turn to the chat, track the price it states and queue it for the store.
+# Buyer turns carry the price they propose, vendor turns the offer passed in
+def add_turn(role, text, speaker=None, offer=None):
+    history = st.session_state.chat3_history
+    message = history.append(role, text, speaker)
+    if role == Role.BUYER:
+        proposed = extract_buyer_offer(text)
+        offer = proposed.value if proposed else None
+    if offer is not None and st.session_state.offer_trajectory is not None:
+        st.session_state.offer_trajectory.append(len(history) - 1, role.value, offer)
+    if st.session_state.negotiation_id:
+        negotiation_store.record_turn(st.session_state.negotiation_id, len(history) - 1, message, offer)
+    return message
+
 # Reset function that properly clears session state
 def reset_app():
+    st.session_state.jobs.cancel_all()
     keys_to_keep = ['chat3_history', 'draft_strategy', 'draft_buyer_message']
     for key in list(st.session_state.keys()):
         if key not in keys_to_keep:
             del st.session_state[key]
-    st.session_state.chat3_history = st.session_state.chat3_history[:1]  # Keep only system message
+    st.session_state.chat3_history.discard_archive()
+    st.session_state.chat3_history = ChatLog.from_env(SYSTEM_PROMPT)  # Keep only system message
+    st.session_state.transcript_html = RenderedTranscript()
     st.session_state.draft_strategy = None
     st.session_state.draft_buyer_message = None
     st.session_state.vendor_auto_responded = False
     st.session_state.negotiation_started = False
     st.session_state.market_insights = None
     st.session_state.current_vendor_offer = None
+    st.session_state.jobs = JobQueue(executor)
+    st.session_state.job_errors = {}
+    st.session_state.conversation_context = ConversationContext.from_env()
+    st.session_state.negotiation_summary = None
+    st.session_state.strategy_speculation_tokens = 0
+    st.session_state.strategy_speculated_key = None
+    st.session_state.negotiation_id = None
+    st.session_state.offer_trajectory = None
+    st.session_state.resume_checked = True
+    st.query_params.clear()
+
+# Function to speculatively start the insights and opening quote for the current selection
+def start_prefetch(vendor, product, quoted_price):
+    jobs = st.session_state.jobs
+    key = (vendor, product, quoted_price)
+    if not st.session_state.market_insights:
+        job = jobs.get("prefetch_insights")
+        if job is None or job.meta["key"] != key:
+            jobs.submit("prefetch_insights", insights_job, vendor, product, quoted_price, meta={"key": key})
+    if not st.session_state.negotiation_started and OPENING_QUOTE_MODE != "template":
+        job = jobs.get("prefetch_quote")
+        if job is None or job.meta["key"] != key:
+            jobs.submit(
+                "prefetch_quote", polish_quote_job if OPENING_QUOTE_MODE == "polish" else vendor_quote_job,
+                vendor, product, quoted_price, meta={"key": key, "buyer_message": None}
+            )
 
-# Function to extract price from vendor message
-def extract_price_from_message(message):
-    # Look for price patterns like $1200, $1,200, $1200.00, 1050, etc.
-    price_patterns = [
-        r'\$(\d+(?:,\d{3})*(?:\.\d{2})?)',  # $1200, $1,200, $1200.00
-        r'(\d+(?:,\d{3})*(?:\.\d{2})?)\s*dollars?',  # 1200 dollars, 1,200 dollars
-        r'(\d+(?:,\d{3})*(?:\.\d{2})?)\s*USD',  # 1200 USD, 1,200 USD
-        r'(?:^|\s)(\d{3,}(?:,\d{3})*(?:\.\d{2})?)(?=\s|$|[^\d])',  # Standalone numbers 3+ digits
-    ]
-    
-    for pattern in price_patterns:
-        matches = re.findall(pattern, message, re.IGNORECASE)
-        if matches:
-            # Return the first match, removing commas and converting to float
-            try:
-                price_str = matches[0].replace(',', '')
-                price_val = float(price_str)
-                # Filter out unrealistic prices (too small or too large)
-                if 1 <= price_val <= 1000000:  # Reasonable price range
-                    return price_val
-            except:
-                continue
-    return None
-
-# Function to generate vendor's initial quote
-def generate_vendor_quote(vendor, product, quoted_price):
-    vendor_prompt = f"""
-    You are a sales representative working for {vendor}. A potential buyer wants to discuss purchasing {product}.
-    
-    IMPORTANT: You are speaking AS the {vendor} sales rep, not giving suggestions about what to say.
-    
-    Respond naturally as a salesperson would in a real conversation. Keep it brief (1-2 sentences).
-    Mention the ${quoted_price} price in a natural way.
-    
-    Example good response: "Hi! Thanks for your interest in our {product}. We're offering it at ${quoted_price} - it's a great value for the quality we provide."
-    
-    Do NOT say things like "Suggestion:" or "The vendor could say:" - just speak as the vendor directly.
-    """
-    
-    try:
-        response = client.chat.completions.create(
-            model="gpt-4",
-            messages=[{"role": "user", "content": vendor_prompt}],
-            temperature=0.7
-        )
-        return response.choices[0].message.content.strip()
-    except Exception as e:
-        return f"Hi! I can offer you our {product} for ${quoted_price}. Great quality at a competitive price."
-
-# Function to generate vendor's response to buyer
-def generate_vendor_response(chat_history, vendor, product, quoted_price, buyer_message):
-    # Get the last few messages for context
-    recent_context = ""
-    if len(chat_history) > 1:
-        recent_messages = chat_history[-3:]
-        for msg in recent_messages:
-            if msg["content"].startswith("Buyer:"):
-                recent_context += f"Buyer said: {msg['content'][7:]}\n"
-            elif msg["content"].startswith(f"Vendor ({vendor}):"):
-                recent_context += f"You (vendor) said: {msg['content'][len(f'Vendor ({vendor}): '):]}\n"
-    
-    vendor_context = f"""
-    You are a {vendor} sales representative. You are currently negotiating the sale of {product} with an asking price of ${quoted_price}.
-    
-    Context of recent conversation:
-    {recent_context}
-    
-    The buyer just said: "{buyer_message}"
-    
-    IMPORTANT: Respond AS the {vendor} sales rep, not as an advisor giving suggestions.
-    
-    Guidelines for your response:
-    - Keep it conversational and brief (1-2 sentences max)
-    - Act like a realistic salesperson who wants to make the sale but also protect profit margins
-    - You can negotiate, but don't give away too much too quickly
-    - Show some flexibility if the buyer makes reasonable points
-    - If you mention a price, be specific (e.g., "I can do $1150" not "I can lower it a bit")
-    - Do NOT say "Suggestion:" or "The vendor could say:" - just respond directly as the vendor
-    
-    Respond naturally as the {vendor} sales rep would in this situation.
-    """
-    
-    try:
-        response = client.chat.completions.create(
-            model="gpt-4",
-            messages=[{"role": "user", "content": vendor_context}],
-            temperature=0.7
-        )
-        return response.choices[0].message.content.strip()
-    except Exception as e:
-        return "Thanks for that. Let me see what I can do for you."
+# Identity of the conversation state a strategy is suggested for: history length plus the recent turns
+def strategy_state_key(history, recent_turns=6):
+    recent = "\n".join(msg.content for msg in history.turns[-recent_turns:])
+    return hashlib.sha256(f"{len(history)}\n{recent}".encode("utf-8")).hexdigest()
+
+# Function to speculatively start the strategy for the current state once the vendor has replied
+def start_strategy_speculation(vendor, product, quoted_price):
+    history = st.session_state.chat3_history
+    jobs = st.session_state.jobs
+    if len(history) < 2 or history[-1].role is not Role.VENDOR or st.session_state["draft_strategy"]:
+        return
+    # Wait for pending vendor turns and opening rewrites, which would change the state
+    if jobs.get("vendor_turn") or jobs.get("opening_polish") or jobs.get("strategy"):
+        return
+    key = strategy_state_key(history)
+    if key == st.session_state.strategy_speculated_key:
+        return
+    strategy_prompt = build_strategy_prompt(history, vendor, product, quoted_price, st.session_state.conversation_context)
+    cost = estimate_tokens([{"content": strategy_prompt}], client.router.route("strategy").max_tokens)
+    if st.session_state.strategy_speculation_tokens + cost > SPECULATIVE_STRATEGY_TOKEN_BUDGET:
+        return
+    st.session_state.strategy_speculation_tokens += cost
+    st.session_state.strategy_speculated_key = key
+    jobs.submit("prefetch_strategy", strategy_job, strategy_prompt, meta={"key": key})
+
+# Function to move a matching prefetched job into `slot`, or start the work now
+def claim_job(slot, prefetch_slot, key, fn, *args, meta):
+    jobs = st.session_state.jobs
+    prefetched = jobs.get(prefetch_slot)
+    if prefetched is not None and prefetched.meta["key"] == key and prefetched.status != FAILED:
+        return jobs.put(slot, jobs.pop(prefetch_slot))
+    return jobs.submit(slot, fn, *args, meta=dict(meta, key=key))
+
+# Function to show a searchable, paginated catalog selectbox (brands, or `brand`'s products).
+# The current selection stays in the options when a search or page change would hide it.
+def catalog_selectbox(label, placeholder, key, brand=None):
+    search = st.text_input(f"Search {label.lower()}", key=f"{key}_search", placeholder="Type to filter")
+    page_key = f"{key}_page"
+    _, total = catalog_page(catalog_signature, brand, search, 1)
+    pages = max(1, -(-total // CATALOG_PAGE_SIZE))
+    if st.session_state.get(page_key, 1) > pages:
+        st.session_state[page_key] = pages
+    page = st.number_input(f"Page (of {pages})", min_value=1, max_value=pages, key=page_key) if pages > 1 else 1
+    names, _ = catalog_page(catalog_signature, brand, search, page)
+
+    options = [placeholder] + names
+    current = st.session_state.get(key)
+    if current and current not in options:
+        if catalog_contains(catalog_signature, brand, current):
+            options.insert(1, current)
+        else:
+            # Left over from another brand: start over rather than fail on an unknown option
+            del st.session_state[key]
+    return st.selectbox(label, options=options, index=0, key=key)
 
-# Function to display chat messages with proper alignment
-def display_chat_message(content, message_type):
+# Function to display a parsed insights table as sortable data, or its markdown if it had no rows
+def display_insights_table(table):
+    if table.rows:
+        st.dataframe(table.records(), hide_index=True)
+    else:
+        st.markdown(table.markdown)
+
+# Function to render a chat message as styled HTML; the text is escaped, and "$" is kept from
+# being read as LaTeX math by st.markdown
+def format_chat_message(content, message_type):
+    content = html.escape(content).replace("$", "&#36;").replace("\n", "<br>")
     if message_type == "vendor":
-        st.markdown(f'<div class="vendor-message">🛍️ {content}</div>', unsafe_allow_html=True)
+        return f'<div class="vendor-message">🛍️ {content}</div>'
     elif message_type == "buyer":
-        st.markdown(f'<div class="buyer-message">🧑‍💼 {content}</div>', unsafe_allow_html=True)
+        return f'<div class="buyer-message">🧑‍💼 {content}</div>'
     elif message_type == "ai_suggestion":
-        st.markdown(f'<div class="ai-suggestion">🧠 {content}</div>', unsafe_allow_html=True)
+        return f'<div class="ai-suggestion">🧠 {content}</div>'
+    return ""
+
+# Function to display chat messages with proper alignment
+def display_chat_message(content, message_type):
+    st.markdown(format_chat_message(content, message_type), unsafe_allow_html=True)
+
+# Function to render one transcript turn as a chat bubble
+def render_transcript_message(msg):
+    return format_chat_message(msg.content, "buyer" if msg.role is Role.BUYER else "vendor")
+
+# ---- Background jobs: run on the worker pool, so they never touch st.* ----
+
+# Job: the vendor's opening quote, streamed into the job's partial text
+def vendor_quote_job(job, vendor, product, quoted_price):
+    if STREAM_VENDOR_REPLIES:
+        for chunk in stream_vendor_quote(client, vendor, product, quoted_price):
+            if job.cancelled:
+                break
+            job.append(chunk)
+        text = job.partial.strip()
+    else:
+        text = generate_vendor_quote(client, vendor, product, quoted_price)
+        job.append(text)
+    return VendorReply(reply=text, offer=None)
+
+# Job: an LLM rewrite of the templated opening quote (None if the rewrite dropped the price)
+def polish_quote_job(job, vendor, product, quoted_price):
+    draft = render_opening_quote(vendor, product, quoted_price)
+    return polish_vendor_quote(client, vendor, product, quoted_price, draft)
+
+# Job: the vendor's reply to the buyer, streamed into the job's partial text
+def vendor_reply_job(job, chat_history, vendor, product, quoted_price, buyer_message, context, current_offer):
+    args = (
+        client, chat_history, vendor, product, quoted_price, buyer_message, context, reply_cache, vendor_engine,
+        current_offer
+    )
+    if not STREAM_VENDOR_REPLIES:
+        reply = generate_vendor_response(*args)
+        job.append(reply.reply)
+        return reply
+
+    reply_stream = stream_vendor_response(*args)
+    for chunk in reply_stream:
+        if job.cancelled:
+            break
+        job.append(chunk)
+    try:
+        return VendorReply.from_json(reply_stream.buffer)
+    except ValueError:
+        # Stream was cut short; keep what was shown and read the price from the text
+        return VendorReply(reply=job.partial.strip(), offer=None)
+
+# Job: a strategy suggestion; the strategy text streams into the job's partial text
+def strategy_job(job, strategy_prompt):
+    suggestion_stream = stream_strategy_suggestion(client, strategy_prompt)
+    for chunk in suggestion_stream:
+        if job.cancelled:
+            break
+        job.append(chunk)
+    return StrategySuggestion.from_json(suggestion_stream.buffer)
+
+# Job: bring the negotiation summary up to date
+def summary_job(job, previous, chat_history, vendor, product, quoted_price, context, trajectory):
+    return refresh_negotiation_summary(client, previous, chat_history, vendor, product, quoted_price, context, trajectory)
+
+# Job: the market insights report
+def insights_job(job, vendor, product, quoted_price):
+    return generate_insights_report(client, completion_cache, vendor, product, quoted_price)
+
+# Function to queue the vendor's reply to a buyer message
+def submit_vendor_reply(vendor, product, quoted_price, buyer_message):
+    # The buyer has moved on, so a speculative strategy for the previous state is no longer useful
+    speculated = st.session_state.jobs.pop("prefetch_strategy")
+    if speculated is not None:
+        speculated.cancel()
+    st.session_state.jobs.submit(
+        "vendor_turn", vendor_reply_job, st.session_state.chat3_history.copy(), vendor, product, quoted_price,
+        buyer_message, st.session_state.conversation_context, st.session_state.current_vendor_offer,
+        meta={"buyer_message": buyer_message}
+    )
+
+# ---- Job views: fragments that poll their job and rerun the page once it finishes ----
+
+# Function to mount a job's polling fragment only while its slot holds a job, so idle pages
+# run no fragments; errors the job left behind are shown in its place
+def job_view(slot, view, *args):
+    error = st.session_state.job_errors.pop(slot, None)
+    if error is not None:
+        show, message = error
+        show(message)
+    if st.session_state.jobs.get(slot) is not None:
+        view(*args)
+
+# Fragment: pending vendor turn, shown as it streams and committed to the chat when done
+@st.fragment(run_every=JOB_POLL_SECONDS)
+def vendor_turn_view(vendor):
+    job = st.session_state.jobs.get("vendor_turn")
+    if job is None:
+        return
+    if not job.finished:
+        display_chat_message(f"Vendor ({vendor}): {job.partial}▌", "vendor")
+        return
+
+    st.session_state.jobs.pop("vendor_turn")
+    if job.status == DONE:
+        reply = job.result
+    else:
+        client.metrics.record_fallback("vendor_quote" if job.meta["buyer_message"] is None else "vendor_reply", job.error)
+        reply = VendorReply(reply=VENDOR_FALLBACK_REPLY, offer=None)
+    if job.meta["buyer_message"] is None:
+        offer = st.session_state.current_vendor_offer
+    else:
+        # Update current vendor offer if a new price is on the table
+        offer = detect_vendor_offer(reply)
+        if offer:
+            st.session_state.current_vendor_offer = offer
+    add_turn(Role.VENDOR, reply.reply, vendor, offer=offer)
+
+    # Fold turns leaving the verbatim window into the rolling summary, off the request path
+    executor.submit(
+        update_conversation_context,
+        client,
+        st.session_state.conversation_context,
+        st.session_state.chat3_history.copy()
+    )
+    st.rerun()
+
+# Fragment: swaps the templated opening quote for its polished rewrite if it lands within the budget
+@st.fragment(run_every=JOB_POLL_SECONDS)
+def opening_polish_view(vendor):
+    job = st.session_state.jobs.get("opening_polish")
+    if job is None:
+        return
+    if not job.finished:
+        if time.time() > job.meta["deadline"]:
+            st.session_state.jobs.pop("opening_polish").cancel()
+            st.rerun()
+        return
+
+    st.session_state.jobs.pop("opening_polish")
+    history = st.session_state.chat3_history
+    # Only swap while the opening is still the last message, i.e. before the buyer has replied
+    if job.status == DONE and job.result and job.finished_at <= job.meta["deadline"] and len(history) == 2:
+        history[1] = ChatMessage(Role.VENDOR, job.result, vendor)
+        if st.session_state.negotiation_id:
+            negotiation_store.record_turn(
+                st.session_state.negotiation_id, 1, history[1], st.session_state.current_vendor_offer
+            )
+    st.rerun()
+
+# Fragment: strategy suggestion in progress
+@st.fragment(run_every=JOB_POLL_SECONDS)
+def strategy_view():
+    job = st.session_state.jobs.get("strategy")
+    if job is None:
+        return
+    if not job.finished:
+        st.info(f"{job.partial}▌" if job.partial else "🤔 Working on a strategy...")
+        return
+
+    st.session_state.jobs.pop("strategy")
+    if job.status == DONE:
+        st.session_state["draft_strategy"] = job.result.strategy
+        st.session_state["draft_buyer_message"] = job.result.message
+        st.rerun()
+    elif isinstance(job.error, ValueError):
+        st.session_state.job_errors["strategy"] = (st.warning, "Couldn't parse AI suggestion properly. Please try again.")
+        st.rerun()
+    elif job.error is not None:
+        st.session_state.job_errors["strategy"] = (st.error, f"Error generating suggestion: {job.error}")
+        st.rerun()
+
+# Fragment: negotiation summary in progress
+@st.fragment(run_every=JOB_POLL_SECONDS)
+def summary_view():
+    job = st.session_state.jobs.get("summary")
+    if job is None:
+        return
+    if not job.finished:
+        st.caption("⏳ Summarizing negotiation...")
+        return
+
+    st.session_state.jobs.pop("summary")
+    if job.status == DONE:
+        if job.result is not st.session_state.negotiation_summary:
+            st.session_state.negotiation_summary = job.result
+            if st.session_state.negotiation_id:
+                negotiation_store.record_summary(st.session_state.negotiation_id, job.result)
+        st.rerun()
+    elif job.error is not None:
+        st.session_state.job_errors["summary"] = (st.error, f"Error generating summary: {job.error}")
+        st.rerun()
+
+# Fragment: market insights report in progress
+@st.fragment(run_every=JOB_POLL_SECONDS)
+def insights_view():
+    job = st.session_state.jobs.get("insights")
+    if job is None:
+        return
+    if not job.finished:
+        st.info("⏳ Fetching market insights...")
+        return
+
+    st.session_state.jobs.pop("insights")
+    if job.status == DONE:
+        st.session_state.market_insights = job.result
+        if st.session_state.negotiation_id:
+            negotiation_store.record_insights(st.session_state.negotiation_id, job.result.raw)
+        st.rerun()
+    elif job.error is not None:
+        st.session_state.job_errors["insights"] = (st.error, f"Error generating insights: {job.error}")
+        st.rerun()
+
+# Sidebar admin panel: per-task LLM latency, tokens and estimated spend for this process
+def metrics_panel():
+    with st.sidebar:
+        st.markdown("### 📈 LLM Metrics")
+        rows = client.metrics.summary()
+        if not rows:
+            st.caption("No LLM calls yet")
+            return
+        total_cost = sum(row["cost $"] for row in rows)
+        total_calls = sum(row["calls"] for row in rows)
+        st.metric("Estimated spend", f"${total_cost:.4f}", help=f"{total_calls} calls since startup")
+        st.dataframe(rows, hide_index=True)
+        if reply_cache is not None:
+            lookups = reply_cache.hits + reply_cache.misses
+            st.caption(
+                f"Vendor reply cache: {reply_cache.hit_rate:.0%} hit rate ({reply_cache.hits}/{lookups} lookups), "
+                f"{len(reply_cache)} buyer intents cached"
+            )
+        st.download_button(
+            "Download Prometheus metrics", client.metrics.prometheus_text(), file_name="llm_metrics.prom",
+            mime="text/plain"
+        )
+
+if SHOW_METRICS_PANEL:
+    metrics_panel()
 
 # Define three-column layout
 col1, col2, col3 = st.columns([1, 1.6, 1])
@@ -267,13 +634,8 @@ with col1:
         reset_app()
         st.rerun()
 
-    # Brand dropdown
-    vendor = st.selectbox(
-        "Supplier/Vendor",
-        options=["Select Brand"] + list(BRAND_PRODUCTS.keys()),
-        index=0,
-        key="vendor_select"
-    )
+    # Brand dropdown, searchable by name prefix
+    vendor = catalog_selectbox("Supplier/Vendor", "Select Brand", "vendor_select")
 
     # Product dropdown - dynamically updates based on vendor
     if vendor == "Select Brand":
@@ -294,13 +656,9 @@ with col1:
         )
         selections_complete = False
     else:
-        product = st.selectbox(
-            "Product Category",
-            options=["Select Product"] + list(BRAND_PRODUCTS[vendor].keys()),
-            index=0,
-            key="product_select"
-        )
-        
+        product = catalog_selectbox("Product Category", "Select Product", "product_select", brand=vendor)
+
+
         if product == "Select Product":
             quoted_price = st.number_input(
                 "Quoted Price ($)",
@@ -315,7 +673,7 @@ with col1:
             quoted_price = st.number_input(
                 "Quoted Price ($)",
                 min_value=0.0,
-                value=float(BRAND_PRODUCTS[vendor][product]),
+                value=float(catalog_price(catalog_signature, vendor, product)),
                 step=50.0,
                 key="quoted_price_input"
             )
@@ -339,26 +697,54 @@ with col1:
         type="primary"
     )
 
+# ---- Background jobs: insights and opening quote run concurrently ----
+if selections_complete:
+    prefetch_key = (vendor, product, quoted_price)
+    if SPECULATIVE_PREFETCH:
+        start_prefetch(vendor, product, quoted_price)
+    if generate_button and not st.session_state.negotiation_id:
+        # Start recording; the ID in the URL lets a refresh or another tab resume this negotiation
+        st.session_state.negotiation_id = new_negotiation_id()
+        negotiation_store.record_negotiation(st.session_state.negotiation_id, vendor, product, quoted_price)
+        st.query_params["negotiation"] = st.session_state.negotiation_id
+    if generate_button and not st.session_state.market_insights and not st.session_state.jobs.get("insights"):
+        claim_job("insights", "prefetch_insights", prefetch_key, insights_job, vendor, product, quoted_price, meta={})
+
 # ---- CENTER PANEL: Price Banner + Chat + Summary ----
 with col2:
     # Price Banner at the top
     if selections_complete and st.session_state.negotiation_started:
-        st.markdown(f"""
-        <div class="price-banner">
-            📊 Initial Quote: ${quoted_price} | Product: {product} | Vendor: {vendor}
-        </div>
-        """, unsafe_allow_html=True)
-        
-        # Show current vendor offer if it exists and is different from initial
-        if st.session_state.current_vendor_offer and st.session_state.current_vendor_offer != quoted_price:
+        trajectory = st.session_state.offer_trajectory
+        col_banner, col_trajectory = st.columns([2, 1]) if trajectory and len(trajectory) > 1 else (st.container(), None)
+        with col_banner:
             st.markdown(f"""
-            <div class="current-offer">
-                💰 Current Vendor Offer: ${st.session_state.current_vendor_offer}
+            <div class="price-banner">
+                📊 Initial Quote: ${quoted_price} | Product: {product} | Vendor: {vendor}
             </div>
             """, unsafe_allow_html=True)
+
+            # Show current vendor offer if it exists and is different from initial
+            if st.session_state.current_vendor_offer and st.session_state.current_vendor_offer != quoted_price:
+                st.markdown(f"""
+                <div class="current-offer">
+                    💰 Current Vendor Offer: ${st.session_state.current_vendor_offer}
+                </div>
+                """, unsafe_allow_html=True)
+
+        # Offer trajectory: both sides' prices by turn, with the running statistics underneath
+        if col_trajectory is not None:
+            with col_trajectory:
+                st.line_chart(trajectory.records(), x="turn", y="price", color="speaker", height=150)
+                stats = [f"{trajectory.discount_pct:.1f}% off quote"]
+                projection = trajectory.projected_convergence()
+                if projection is not None and projection[0] > 0:
+                    stats.append(f"meet ≈ ${projection[1]:,.2f} in {projection[0]:.1f} round(s)")
+                st.caption(" · ".join(stats))
     
     # st.divider()
     st.subheader("💬 Negotiation Chat")
+    if vendor_engine.mode == "practice":
+        st.caption("🎯 Practice mode: the vendor is played by the local negotiation engine")
     
     if not selections_complete:
         st.info("👈 Please complete your selections in the left panel to start negotiating")
@@ -370,9 +756,22 @@ with col2:
     else:
         # Auto-generate vendor quote when insights are generated
         if generate_button and not st.session_state.vendor_auto_responded:
-            vendor_quote = generate_vendor_quote(vendor, product, quoted_price)
-            vendor_msg = f"Vendor ({vendor}): {vendor_quote}"
-            st.session_state.chat3_history.append({"role": "assistant", "content": vendor_msg})
+            st.session_state.offer_trajectory = OfferTrajectory(quoted_price)
+            if OPENING_QUOTE_MODE == "llm":
+                claim_job(
+                    "vendor_turn", "prefetch_quote", prefetch_key, vendor_quote_job, vendor, product, quoted_price,
+                    meta={"buyer_message": None}
+                )
+            else:
+                # The templated opening shows instantly; a polished rewrite may replace it shortly
+                opening = render_opening_quote(vendor, product, quoted_price)
+                add_turn(Role.VENDOR, opening, vendor, offer=quoted_price)
+                if OPENING_QUOTE_MODE == "polish":
+                    polish = claim_job(
+                        "opening_polish", "prefetch_quote", prefetch_key, polish_quote_job, vendor, product, quoted_price,
+                        meta={"buyer_message": None}
+                    )
+                    polish.meta["deadline"] = time.time() + OPENING_POLISH_BUDGET_SECONDS
             st.session_state.vendor_auto_responded = True
             st.session_state.negotiation_started = True
             # Set initial vendor offer
@@ -384,75 +783,39 @@ with col2:
                 buyer_input = st.text_input("🧑‍💼 Your response as Buyer:", key="buyer_input_form")
                 submitted = st.form_submit_button("Send Message")
 
-            if submitted and buyer_input:
-                # Add buyer message
-                buyer_msg = f"Buyer: {buyer_input}"
-                st.session_state.chat3_history.append({"role": "user", "content": buyer_msg})
-                
-                # Generate vendor response
-                vendor_response = generate_vendor_response(
-                    st.session_state.chat3_history, vendor, product, quoted_price, buyer_input
-                )
-                vendor_msg = f"Vendor ({vendor}): {vendor_response}"
-                st.session_state.chat3_history.append({"role": "assistant", "content": vendor_msg})
-                
-                # Extract and update current vendor offer if a new price is mentioned
-                new_price = extract_price_from_message(vendor_response)
-                if new_price:
-                    st.session_state.current_vendor_offer = new_price
-                
-                st.rerun()
+            if submitted and buyer_input and not st.session_state.jobs.get("vendor_turn"):
+                # Add buyer message; the vendor reply is generated in the background
+                add_turn(Role.BUYER, buyer_input)
+                submit_vendor_reply(vendor, product, quoted_price, buyer_input)
 
             # --- Display Chat History with Custom Styling ---
-            for msg in st.session_state.chat3_history[1:]:
-                if msg["role"] == "user":
-                    if msg["content"].startswith("Buyer:"):
-                        display_chat_message(msg['content'], "buyer")
-                    else:
-                        display_chat_message(f"🤝 {msg['content']}", "buyer")
-                elif msg["role"] == "assistant":
-                    if msg["content"].startswith("Vendor"):
-                        display_chat_message(msg['content'], "vendor")
-                    else:
-                        display_chat_message(f"AI Suggestion: {msg['content']}", "ai_suggestion")
+            history = st.session_state.chat3_history
+            if history.offset > 1:
+                st.caption(f"{history.offset - 1} earlier message(s) archived")
+            # One markdown element for the whole transcript; only new turns are rendered
+            transcript = st.session_state.transcript_html.sync(history.retained, render_transcript_message)
+            if transcript:
+                st.markdown(transcript, unsafe_allow_html=True)
+
+            # --- Pending Vendor Turn: streams into a new bubble below the history ---
+            job_view("opening_polish", opening_polish_view, vendor)
+            job_view("vendor_turn", vendor_turn_view, vendor)
 
             # --- Strategy Suggestion - Only show if there's recent vendor response ---
             if len(st.session_state.chat3_history) > 1:
+                if SPECULATIVE_STRATEGY:
+                    start_strategy_speculation(vendor, product, quoted_price)
                 if st.button("💡 Get AI Strategy Suggestion"):
-                    strategy_prompt = f"""
-                    You are assisting a buyer in negotiation with {vendor} for {product} at ${quoted_price}.
-
-                    Analyze the recent conversation and provide:
-                    1. A strategic insight on how the buyer should respond
-                    2. A suggested buyer message that is natural and persuasive
-
-                    Recent conversation context:
-                    {st.session_state.chat3_history[-3:] if len(st.session_state.chat3_history) >= 3 else st.session_state.chat3_history[1:]}
-
-                    Format your response as:
-                    Strategy: <your strategic advice>
-                    Message: <your suggested buyer response>
-                    """
-                    try:
-                        ai_response = client.chat.completions.create(
-                            model="gpt-4",
-                            messages=[{"role": "user", "content": strategy_prompt}],
-                            temperature=0.6
-                        )
-                        full_output = ai_response.choices[0].message.content.strip()
-
-                        # Parse strategy and message
-                        if "Strategy:" in full_output and "Message:" in full_output:
-                            strategy = full_output.split("Strategy:")[1].split("Message:")[0].strip()
-                            message = full_output.split("Message:")[1].strip()
-                            
-                            st.session_state["draft_strategy"] = strategy
-                            st.session_state["draft_buyer_message"] = message
-                        else:
-                            st.warning("Couldn't parse AI suggestion properly. Please try again.")
-
-                    except Exception as e:
-                        st.error(f"Error generating suggestion: {e}")
+                    strategy_prompt = build_strategy_prompt(
+                        st.session_state.chat3_history, vendor, product, quoted_price,
+                        st.session_state.conversation_context
+                    )
+                    # Served instantly when a speculative run for this exact state is done or underway
+                    claim_job(
+                        "strategy", "prefetch_strategy", strategy_state_key(st.session_state.chat3_history),
+                        strategy_job, strategy_prompt, meta={}
+                    )
+                job_view("strategy", strategy_view)
 
             # --- Display Strategy + Drafted Buyer Message ---
             if st.session_state["draft_strategy"] and st.session_state["draft_buyer_message"]:
@@ -466,22 +829,9 @@ with col2:
                 col_respond1, col_respond2 = st.columns(2)
                 with col_respond1:
                     if st.button("📨 Send This Response", type="primary"):
-                        # Send the AI-suggested message
-                        buyer_msg = f"Buyer: {st.session_state['draft_buyer_message']}"
-                        st.session_state.chat3_history.append({"role": "user", "content": buyer_msg})
-                        
-                        # Generate vendor response to AI suggestion
-                        vendor_response = generate_vendor_response(
-                            st.session_state.chat3_history, vendor, product, quoted_price, 
-                            st.session_state['draft_buyer_message']
-                        )
-                        vendor_msg = f"Vendor ({vendor}): {vendor_response}"
-                        st.session_state.chat3_history.append({"role": "assistant", "content": vendor_msg})
-                        
-                        # Extract and update current vendor offer if a new price is mentioned
-                        new_price = extract_price_from_message(vendor_response)
-                        if new_price:
-                            st.session_state.current_vendor_offer = new_price
+                        # Send the AI-suggested message; the vendor reply is generated in the background
+                        add_turn(Role.BUYER, st.session_state['draft_buyer_message'])
+                        submit_vendor_reply(vendor, product, quoted_price, st.session_state['draft_buyer_message'])
                         
                         # Clear suggestions
                         st.session_state["draft_strategy"] = None
@@ -499,87 +849,34 @@ with col2:
     st.subheader("🧾 Negotiation Summary")
 
     if st.session_state.negotiation_started and len(st.session_state.chat3_history) > 2:
-        if st.button("📋 Generate Negotiation Summary"):
-            # Use the chat history to generate summary
-            chat_content = "\n".join([msg["content"] for msg in st.session_state.chat3_history[1:]])
-            
-            with st.spinner("Summarizing negotiation..."):
-                summary_prompt = f"""
-                Based on this negotiation between buyer and vendor for {product} from {vendor} (initially quoted at ${quoted_price}), create a structured summary:
-
-                - **Key Discussion Points**
-                - **Negotiation Progress** 
-                - **Current Status**
-                - **Price Movement** (if any)
-                - **Next Steps/Action Items**
-                - **Strategic Insights**
-
-                Conversation:
-                {chat_content}
-                """
-                try:
-                    response = client.chat.completions.create(
-                        model="gpt-4",
-                        messages=[{"role": "user", "content": summary_prompt}],
-                        temperature=0.5
-                    )
-                    summary = response.choices[0].message.content
-                    st.markdown("### 📄 Negotiation Summary")
-                    st.markdown(summary)
-                except Exception as e:
-                    st.error(f"Error generating summary: {e}")
+        summary_state = st.session_state.negotiation_summary
+        button_label = "📋 Generate Negotiation Summary" if summary_state is None else "🔁 Refresh Negotiation Summary"
+        if st.button(button_label, disabled=st.session_state.jobs.is_active("summary")):
+            st.session_state.jobs.submit(
+                "summary", summary_job, summary_state, st.session_state.chat3_history.copy(),
+                vendor, product, quoted_price, st.session_state.conversation_context,
+                copy.deepcopy(st.session_state.offer_trajectory)
+            )
+        job_view("summary", summary_view)
+
+        # Display the latest summary (persistent across reruns)
+        if st.session_state.negotiation_summary:
+            st.markdown("### 📄 Negotiation Summary")
+            st.markdown(st.session_state.negotiation_summary["text"])
+            new_turns = len(st.session_state.chat3_history) - st.session_state.negotiation_summary["covered"]
+            if new_turns > 0:
+                st.caption(f"{new_turns} new message(s) since this summary - refresh to include them")
     else:
         st.info("Start negotiating to generate a summary of your conversation")
 
 # ---- RIGHT PANEL: Market Insights ----
 with col3:
-    # Generate insights only when button is clicked
-    if generate_button and selections_complete and not st.session_state.market_insights:
-        with st.spinner("Fetching market insights..."):
-            prompt = f"""
-            You are an expert procurement advisor. Prepare a structured negotiation insights report for a buyer:
-
-            ### Market Intelligence Brief:
-            (Provide insights on {product} market trends, {vendor}'s position, and negotiation leverage points)
-
-            ### Current Market Rates:
-            Brand | Model | Price Range | Notes
-            --- | --- | --- | ---
-            (Include 3-4 comparable {product} options with realistic pricing)
-
-            ### Previous Purchases:
-            Date | Item | Quantity | Unit Price | Total | OTIF
-            --- | --- | --- | ---
-            (Generate realistic past purchase data with {vendor})
-
-            ### Competitor Comparison:
-            Vendor | Unit Price | Key Advantage | Delivery
-            --- | --- | --- | ---
-            (Compare {vendor} with 2-3 competitors for {product})
-
-            ### Negotiation Tips:
-            (Provide 3-4 specific tactics for negotiating {product} with {vendor})
-
-            Context: {vendor} | {product} | ${quoted_price}
-            """
-            try:
-                response = client.chat.completions.create(
-                    model="gpt-4",
-                    messages=[{"role": "user", "content": prompt}],
-                    temperature=0.4
-                )
-                st.session_state.market_insights = response.choices[0].message.content
-                
-            except Exception as e:
-                st.error(f"Error generating insights: {e}")
-                st.session_state.market_insights = None
+    # Insights are generated in the background once the button is clicked
+    job_view("insights", insights_view)
 
     # Display market insights (persistent once generated)
     if st.session_state.market_insights and selections_complete:
-        def extract_section(text: str, section: str) -> str:
-            pattern = rf"### {re.escape(section)}:\n(.*?)(?=\n###|\Z)"
-            match = re.search(pattern, text, re.DOTALL)
-            return match.group(1).strip() if match else "No data available."
+        report = st.session_state.market_insights
 
         st.markdown("### 🧠 Market Insights")
         st.markdown(f"*Analysis for {product} from {vendor}*")
@@ -587,23 +884,27 @@ with col3:
 
         if include_brief:
             st.markdown("#### 📄 Market Intelligence Brief")
-            st.markdown(extract_section(st.session_state.market_insights, "Market Intelligence Brief"))
+            st.markdown(report.brief)
 
         if include_rates:
             st.markdown("#### 📈 Current Market Rates")
-            st.markdown(extract_section(st.session_state.market_insights, "Current Market Rates"))
+            display_insights_table(report.rates)
 
         if include_purchases:
             st.markdown("#### 📦 Previous Purchase History")
-            st.markdown(extract_section(st.session_state.market_insights, "Previous Purchases"))
+            previous = previous_negotiations(vendor, st.session_state.negotiation_id)
+            if previous:
+                st.dataframe(previous, hide_index=True)
+            else:
+                st.caption(f"No previous negotiations with {vendor} on record")
 
         if include_competitors:
             st.markdown("#### ⚖️ Competitor Comparison")
-            st.markdown(extract_section(st.session_state.market_insights, "Competitor Comparison"))
+            display_insights_table(report.competitors)
         
         # Always show negotiation tips
         st.markdown("#### 💡 Negotiation Tips")
-        st.markdown(extract_section(st.session_state.market_insights, "Negotiation Tips"))
+        st.markdown(report.tips)
         
     elif not selections_complete:
         st.info("👈 Complete your selections to view market insights")
@@ -0,0 +1,227 @@
+"""Batch negotiation: run many vendor/product negotiations headlessly, in parallel.
+
+    python batch.py negotiations.csv --out results.jsonl [--parallel 8] [--max-turns 8]
+
+The input CSV has the columns vendor, product, quoted_price and (optionally) target_price.
+Each row is negotiated by a buyer strategist (the strategy prompt, told the target price)
+against the vendor persona, using negotiation.NegotiationSession, until the vendor meets the
+target, the vendor stops moving, or --max-turns buyer messages have been sent. Every finished
+negotiation is written as soon as it completes: one JSON object per line for .jsonl output,
+row groups for .parquet output (needs pyarrow). Records carry the offer trajectory, outcome
+and negotiation summary.
+
+Calls share one LLMClient, so its request/token rate limits (OPENAI_RPM_LIMIT,
+OPENAI_TPM_LIMIT, or --rpm/--tpm) apply across all parallel negotiations. Set
+LLM_BACKEND=fake to dry-run without spending API quota.
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from context import ConversationContext
+from llm import LLMClient
+from negotiation import NegotiationSession
+from pricing import extract_buyer_offer
+from vendor_engine import MODES, VendorEngine
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # Parquet output needs pyarrow; JSONL works without it
+    pa = pq = None
+
+DEAL, NO_DEAL, ERROR = "deal", "no_deal", "error"
+
+
+def _price(value):
+    value = (value or "").strip().replace("$", "").replace(",", "")
+    return float(value) if value else None
+
+
+# Negotiation jobs from a CSV with vendor, product, quoted_price[, target_price] columns
+def read_jobs(path):
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        for line, row in enumerate(csv.DictReader(f), start=2):
+            try:
+                yield {
+                    "vendor": row["vendor"].strip(),
+                    "product": row["product"].strip(),
+                    "quoted_price": _price(row["quoted_price"]),
+                    "target_price": _price(row.get("target_price")),
+                }
+            except (KeyError, ValueError, AttributeError) as e:
+                raise ValueError(f"{path}:{line}: bad negotiation row {row!r}") from e
+
+
+# One buyer-strategist vs. vendor negotiation; returns the result record. It's a deal when the
+# vendor reaches the target price or meets the buyer's last offer; otherwise no deal
+def run_negotiation(client, job, max_turns=8, stall_turns=2, engine=None):
+    vendor, product, quoted, target = job["vendor"], job["product"], job["quoted_price"], job["target_price"]
+    started = time.perf_counter()
+    session = NegotiationSession(
+        client, vendor, product, quoted, ConversationContext.from_env(), target_price=target, engine=engine
+    )
+    record = dict(job, status=ERROR, final_offer=None, discount_pct=None, turns=0, trajectory=[], summary=None, error=None)
+
+    try:
+        session.open(stream=False, template=True)
+        trajectory = record["trajectory"]
+        trajectory.append({"turn": 0, "buyer_offer": None, "vendor_offer": session.current_offer})
+        stalled, closed = 0, False
+        for turn in range(1, max_turns + 1):
+            buyer_message = session.suggest_strategy().message
+            buyer_offer = extract_buyer_offer(buyer_message)
+            previous = session.current_offer
+            session.reply(buyer_message, stream=False)
+            trajectory.append({
+                "turn": turn,
+                "buyer_offer": buyer_offer.value if buyer_offer else None,
+                "vendor_offer": session.current_offer,
+            })
+            record["turns"] = turn
+
+            # A deal: the vendor came down to the target, or met (accepted) the buyer's number
+            if target is not None and session.current_offer <= target:
+                closed = True
+                break
+            if buyer_offer and session.current_offer <= buyer_offer.value:
+                closed = True
+                break
+            stalled = stalled + 1 if session.current_offer == previous else 0
+            if stalled >= stall_turns:
+                break
+
+        record["final_offer"] = session.current_offer
+        record["discount_pct"] = round((1 - session.current_offer / quoted) * 100, 1) if quoted else None
+        # Stalled or out of turns without either side closing: no deal, target or not
+        record["status"] = DEAL if closed else NO_DEAL
+        record["summary"] = session.summarize()
+    except Exception as e:
+        record["error"] = f"{type(e).__name__}: {e}"
+    record["transcript"] = [msg.content for msg in session.history.turns]
+    record["duration_s"] = round(time.perf_counter() - started, 3)
+    return record
+
+
+# Run `jobs` with at most `parallel` negotiations in flight, yielding records as they finish.
+# Jobs are pulled from the iterable lazily, so arbitrarily long inputs stream through.
+def run_batch(client, jobs, parallel=8, max_turns=8, stall_turns=2, engine=None):
+    jobs = iter(jobs)
+    with ThreadPoolExecutor(max_workers=parallel, thread_name_prefix="batch") as pool:
+        pending = set()
+        while True:
+            for job in jobs:
+                pending.add(pool.submit(run_negotiation, client, job, max_turns, stall_turns, engine))
+                if len(pending) >= parallel:
+                    break
+            if not pending:
+                return
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield future.result()
+
+
+class JsonlWriter:
+    def __init__(self, path):
+        self._file = open(path, "w", encoding="utf-8")
+
+    def write(self, record):
+        self._file.write(json.dumps(record) + "\n")
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+
+RESULT_SCHEMA = None if pa is None else pa.schema([
+    ("vendor", pa.string()),
+    ("product", pa.string()),
+    ("quoted_price", pa.float64()),
+    ("target_price", pa.float64()),
+    ("status", pa.string()),
+    ("final_offer", pa.float64()),
+    ("discount_pct", pa.float64()),
+    ("turns", pa.int64()),
+    ("trajectory", pa.list_(pa.struct([
+        ("turn", pa.int64()), ("buyer_offer", pa.float64()), ("vendor_offer", pa.float64()),
+    ]))),
+    ("summary", pa.string()),
+    ("error", pa.string()),
+    ("transcript", pa.list_(pa.string())),
+    ("duration_s", pa.float64()),
+])
+
+
+# Buffers records into row groups of `row_group_size` so results land on disk as they finish
+class ParquetWriter:
+    def __init__(self, path, row_group_size=100):
+        if pq is None:
+            raise RuntimeError("Parquet output needs the pyarrow package")
+        self._writer = pq.ParquetWriter(path, RESULT_SCHEMA)
+        self.row_group_size = row_group_size
+        self._rows = []
+
+    def write(self, record):
+        self._rows.append(record)
+        if len(self._rows) >= self.row_group_size:
+            self._flush()
+
+    def _flush(self):
+        if self._rows:
+            self._writer.write_table(pa.Table.from_pylist(self._rows, schema=RESULT_SCHEMA))
+            self._rows = []
+
+    def close(self):
+        self._flush()
+        self._writer.close()
+
+
+def open_writer(path):
+    if path.lower().endswith((".parquet", ".pq")):
+        return ParquetWriter(path)
+    return JsonlWriter(path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("input", help="CSV of vendor, product, quoted_price, target_price")
+    parser.add_argument("--out", required=True, help="results file (.jsonl or .parquet)")
+    parser.add_argument("--parallel", type=int, default=8, help="negotiations in flight at once")
+    parser.add_argument("--max-turns", type=int, default=8, help="buyer messages per negotiation")
+    parser.add_argument("--stall-turns", type=int, default=2, help="stop after this many turns without a vendor concession")
+    parser.add_argument("--vendor-engine", choices=MODES, default=None, help="vendor engine mode (overrides VENDOR_ENGINE_MODE)")
+    parser.add_argument("--rpm", type=int, default=None, help="requests per minute (overrides OPENAI_RPM_LIMIT)")
+    parser.add_argument("--tpm", type=int, default=None, help="tokens per minute (overrides OPENAI_TPM_LIMIT)")
+    args = parser.parse_args()
+
+    if args.rpm is not None:
+        os.environ["OPENAI_RPM_LIMIT"] = str(args.rpm)
+    if args.tpm is not None:
+        os.environ["OPENAI_TPM_LIMIT"] = str(args.tpm)
+    if args.vendor_engine is not None:
+        os.environ["VENDOR_ENGINE_MODE"] = args.vendor_engine
+    client = LLMClient.from_env()
+    engine = VendorEngine.from_env()
+
+    writer = open_writer(args.out)
+    counts = {DEAL: 0, NO_DEAL: 0, ERROR: 0}
+    started = time.perf_counter()
+    try:
+        for record in run_batch(client, read_jobs(args.input), args.parallel, args.max_turns, args.stall_turns, engine):
+            writer.write(record)
+            counts[record["status"]] += 1
+            print(f"{record['status']:8} {record['vendor']} / {record['product']}: "
+                  f"{record['quoted_price']} -> {record['final_offer']} in {record['turns']} turn(s)", file=sys.stderr)
+    finally:
+        writer.close()
+    total = sum(counts.values())
+    print(f"{total} negotiation(s) in {time.perf_counter() - started:.1f}s: {counts[DEAL]} deal(s), "
+          f"{counts[NO_DEAL]} without a deal, {counts[ERROR]} failed -> {args.out}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
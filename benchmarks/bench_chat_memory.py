@@ -0,0 +1,103 @@
+"""Per-session memory footprint of the chat transcript store.
+
+Run from the repository root:
+
+    python benchmarks/bench_chat_memory.py [--sessions N] [--turns T] [--cap C]
+
+Compares the original list of {"role", "content"} dicts (speaker prefixed into every
+string) with chat.ChatLog, uncapped and with a CHAT_MAX_MESSAGES-style cap that moves
+older turns to an on-disk archive. Reports traced bytes per session.
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from chat import ChatLog, Role  # noqa: E402
+from negotiation import SYSTEM_PROMPT  # noqa: E402
+
+VENDORS = ["Apple", "Dell", "Lenovo", "HP", "Samsung"]
+BUYER_LINES = [
+    "That's above our budget. Could you do ${price}?",
+    "We're comparing a few vendors. Would ${price} work for you if we order ten units?",
+    "I can get approval for ${price} today.",
+]
+VENDOR_LINES = [
+    "I hear you, but the best I can do is ${price} given current supply.",
+    "We have some room - I can come down to ${price} if you can commit this quarter.",
+    "That's a bit low for us. How about ${price}, including next-day delivery?",
+]
+
+
+def script(session, turns):
+    rng = random.Random(session)
+    vendor = rng.choice(VENDORS)
+    lines = []
+    for turn in range(turns):
+        price = 1500 - turn * rng.randint(5, 20)
+        pool = BUYER_LINES if turn % 2 else VENDOR_LINES
+        # Stored encoded so each build decodes fresh strings, as they'd arrive from the form or API
+        lines.append((turn % 2 == 1, rng.choice(pool).format(price=price).encode("utf-8")))
+    return vendor, lines
+
+
+def build_dicts(vendor, lines):
+    history = [{"role": "system", "content": SYSTEM_PROMPT}]
+    for is_buyer, raw in lines:
+        text = raw.decode("utf-8")
+        if is_buyer:
+            history.append({"role": "user", "content": f"Buyer: {text}"})
+        else:
+            history.append({"role": "assistant", "content": f"Vendor ({vendor}): {text}"})
+    return history
+
+
+def build_chatlog(vendor, lines, cap=None, archive_dir=None):
+    archive = os.path.join(archive_dir, f"{id(lines)}.jsonl") if archive_dir else None
+    history = ChatLog(SYSTEM_PROMPT, max_messages=cap, archive_path=archive)
+    for is_buyer, raw in lines:
+        text = raw.decode("utf-8")
+        if is_buyer:
+            history.append(Role.BUYER, text)
+        else:
+            history.append(Role.VENDOR, text, vendor)
+    return history
+
+
+def measure(build, scripts):
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    sessions = [build(vendor, lines) for vendor, lines in scripts]
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del sessions
+    return (after - before) / len(scripts)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=200)
+    parser.add_argument("--turns", type=int, default=40)
+    parser.add_argument("--cap", type=int, default=20, help="max turns held in memory for the capped run")
+    args = parser.parse_args()
+
+    scripts = [script(session, args.turns) for session in range(args.sessions)]
+    with tempfile.TemporaryDirectory() as archive_dir:
+        results = [
+            ("list of dicts", measure(build_dicts, scripts)),
+            ("ChatLog", measure(build_chatlog, scripts)),
+            (f"ChatLog, cap {args.cap}", measure(lambda v, l: build_chatlog(v, l, args.cap, archive_dir), scripts)),
+        ]
+
+    baseline = results[0][1]
+    print(f"{args.sessions} sessions x {args.turns} turns, message text included")
+    for label, per_session in results:
+        print(f"{label:20}{per_session / 1024:>10.1f} KiB/session{per_session / baseline:>8.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""Speed and accuracy benchmark for vendor-offer price extraction.
+
+Run from the repository root:
+
+    python benchmarks/bench_price_extraction.py [--iterations N]
+
+Compares pricing.extract_price_from_message with the original per-pattern
+implementation over a corpus of realistic vendor replies. test_price_extraction.py
+asserts the same corpus under pytest.
+"""
+import argparse
+import os
+import re
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from pricing import extract_price_from_message  # noqa: E402
+
+# (vendor message, expected current offer or None)
+CORPUS = [
+    ("Hi! Thanks for your interest in our MacBook. We're offering it at $1500 - it's a great value.", 1500),
+    ("I can do $1,350 if you commit today.", 1350),
+    ("We've come down from $1500 to $1150, which is really our floor.", 1150),
+    ("I can do $1150 instead of $1500, but that's as low as I can go.", 1150),
+    ("The list price is $1,800 but for you I could go as low as $1,620.", 1620),
+    ("Our best price would be 1250 dollars for a 10-unit order.", 1250),
+    ("Honestly, 1,275 USD is the lowest I can approve.", 1275),
+    ("For an annual commitment we could do USD 1.2k per seat.", 1200),
+    ("I understand your budget, but I can't go below $1,400.00 on this one.", 1400),
+    ("If you order 50 units, I can make it $95 each.", 95),
+    ("That's 20% below market - $480 is a great deal.", 480),
+    ("Competitors charge $700, and we're only asking $600.", 600),
+    ("Let me check with my manager and get back to you.", None),
+    ("We can include free shipping and a 2-year warranty at the same price.", None),
+    ("Normally $12 per case, but I can offer $10.50 for a pallet order.", 10.50),
+    ("Shipping in 2025 is booked up, but I can still hold $1,290 for you.", 1290),
+    ("Our MSRP is €1,100; I'm willing to meet you at €990.", 990),
+    ("How about £850? That includes setup.", 850),
+    ("I was at $1,350 earlier - let's settle on $1,300.", 1300),
+    ("I can do 1.5k for the bundle.", 1500),
+    ("We're at 1,450 now, which is 3.3% off our usual 1,500.", 1450),
+    ("The final offer is $1199.99 and it expires Friday.", 1199.99),
+    ("Sure, $3.25 per pack works for an order of 10,000 packs.", 3.25),
+    ("At that volume I can approve 38 dollars per set.", 38),
+    ("Your proposal of $1000 is too low; the best I can do is $1225.", 1225),
+    ("Best I can do is $1,250 (that is $250 off).", 1250),
+    ("OK, $950 - that is 5% off our list price of $1000.", 950),
+    ("Either $1,350 for pickup or $1,400 with delivery.", 1350),
+    ("For a case of 48 I can do $0.75 a bar.", 0.75),
+    ("It's $0.80 each - the lowest I can go is $0.72.", 0.72),
+]
+
+
+# The original implementation from app.py, kept here for comparison
+def legacy_extract_price_from_message(message):
+    price_patterns = [
+        r'\$(\d+(?:,\d{3})*(?:\.\d{2})?)',
+        r'(\d+(?:,\d{3})*(?:\.\d{2})?)\s*dollars?',
+        r'(\d+(?:,\d{3})*(?:\.\d{2})?)\s*USD',
+        r'(?:^|\s)(\d{3,}(?:,\d{3})*(?:\.\d{2})?)(?=\s|$|[^\d])',
+    ]
+    for pattern in price_patterns:
+        matches = re.findall(pattern, message, re.IGNORECASE)
+        if matches:
+            try:
+                price_val = float(matches[0].replace(',', ''))
+                if 1 <= price_val <= 1000000:
+                    return price_val
+            except Exception:
+                continue
+    return None
+
+
+def current(message):
+    match = extract_price_from_message(message)
+    return match.value if match else None
+
+
+def accuracy(extract):
+    correct = 0
+    misses = []
+    for message, expected in CORPUS:
+        got = extract(message)
+        if got == expected:
+            correct += 1
+        else:
+            misses.append((message, expected, got))
+    return correct / len(CORPUS), misses
+
+
+def speed(extract, iterations):
+    def run():
+        for message, _ in CORPUS:
+            extract(message)
+    seconds = min(timeit.repeat(run, number=iterations, repeat=5))
+    return seconds / (iterations * len(CORPUS)) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--show-misses", action="store_true")
+    args = parser.parse_args()
+
+    print(f"{'implementation':<12} {'accuracy':>9} {'us/message':>11}")
+    for name, extract in (("legacy", legacy_extract_price_from_message), ("pricing", current)):
+        acc, misses = accuracy(extract)
+        print(f"{name:<12} {acc:>8.0%} {speed(extract, args.iterations):>11.2f}")
+        if args.show_misses:
+            for message, expected, got in misses:
+                print(f"    expected {expected!r:>8} got {got!r:>8}: {message}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""Cold-start and warm-rerun time of the Streamlit app script.
+
+Run from the repository root:
+
+    python benchmarks/bench_startup.py [--cold-runs N] [--reruns R]
+
+Each cold run starts a fresh Python process (empty module cache, empty catalog index,
+store and completion cache in a temporary directory, as on a newly scheduled pod) and
+runs app.py once through streamlit.testing's AppTest, then reruns it R times in the same
+session. Reports the Streamlit import time, the first script run, warm rerun p50/p95,
+and whether the OpenAI SDK got imported before any LLM call was made. No API calls are
+made; OPENAI_API_KEY defaults to a placeholder.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+APP = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "app.py")
+
+
+def percentile(values, pct):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+# One cold start, inside a fresh interpreter; prints its timings as JSON
+def child(reruns):
+    started = time.perf_counter()
+    from streamlit.testing.v1 import AppTest
+    import_s = time.perf_counter() - started
+
+    at = AppTest.from_file(APP, default_timeout=120)
+    started = time.perf_counter()
+    at.run()
+    cold_s = time.perf_counter() - started
+    if at.exception:
+        raise SystemExit(f"app.py raised on the first run: {at.exception[0].value}")
+
+    warm = []
+    for _ in range(reruns):
+        started = time.perf_counter()
+        at.run()
+        warm.append(time.perf_counter() - started)
+    print(json.dumps({
+        "import_s": import_s,
+        "cold_s": cold_s,
+        "warm_s": warm,
+        "openai_loaded": "openai" in sys.modules,
+    }))
+
+
+def cold_start(reruns):
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(
+            os.environ,
+            OPENAI_API_KEY=os.environ.get("OPENAI_API_KEY", "sk-benchmark"),
+            NEGOTIATION_DB_PATH=os.path.join(tmp, "negotiations.sqlite3"),
+            LLM_CACHE_PATH=os.path.join(tmp, "llm_cache.sqlite3"),
+            CATALOG_INDEX_DIR=os.path.join(tmp, "catalog"),
+        )
+        started = time.perf_counter()
+        out = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--child", "--reruns", str(reruns)],
+            env=env, capture_output=True, text=True, check=True,
+        ).stdout
+        result = json.loads(out.strip().splitlines()[-1])
+        result["process_s"] = time.perf_counter() - started
+        return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--cold-runs", type=int, default=5, help="fresh processes to start")
+    parser.add_argument("--reruns", type=int, default=20, help="warm reruns per process")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(args.reruns)
+        return
+
+    runs = [cold_start(args.reruns) for _ in range(args.cold_runs)]
+    warm = [t for run in runs for t in run["warm_s"]]
+    print(f"{args.cold_runs} cold start(s), {args.reruns} warm rerun(s) each")
+    print(f"  streamlit import     median {statistics.median(r['import_s'] for r in runs) * 1000:8.1f} ms")
+    print(f"  first script run     median {statistics.median(r['cold_s'] for r in runs) * 1000:8.1f} ms"
+          f"   min {min(r['cold_s'] for r in runs) * 1000:8.1f} ms")
+    print(f"  whole process        median {statistics.median(r['process_s'] for r in runs) * 1000:8.1f} ms")
+    if warm:
+        print(f"  warm rerun           p50    {percentile(warm, 50) * 1000:8.1f} ms"
+              f"   p95 {percentile(warm, 95) * 1000:8.1f} ms")
+    print(f"  openai imported before first LLM call: {'yes' if any(r['openai_loaded'] for r in runs) else 'no'}")
+
+
+if __name__ == "__main__":
+    main()
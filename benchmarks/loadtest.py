@@ -0,0 +1,179 @@
+"""Headless load test: N concurrent buyers negotiating against the offline fake LLM.
+
+Run from the repository root:
+
+    python benchmarks/loadtest.py [--buyers N] [--turns T] [--time-scale S]
+
+Each buyer drives a negotiation.NegotiationSession (the same prompts, context window
+and offer tracking the app uses) on an LLMClient backed by fake_llm.FakeBackend, so
+no API quota is spent. Reports p50/p95/p99 turn latency and time to first token,
+throughput, traced memory per session and a per-task breakdown of LLM time and
+projected spend. Fake latency is configured through the FAKE_LLM_* environment
+variables; --time-scale shrinks every simulated delay.
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import threading
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from context import ConversationContext  # noqa: E402
+from fake_llm import FakeBackend  # noqa: E402
+from llm import LLMClient  # noqa: E402
+from negotiation import NegotiationSession  # noqa: E402
+from reply_cache import VendorReplyCache  # noqa: E402
+from vendor_engine import MODES, VendorEngine  # noqa: E402
+
+SCENARIOS = [
+    ("Apple", "MacBook Pro 14", 1999),
+    ("Dell", "XPS 13", 1299),
+    ("Lenovo", "ThinkPad X1 Carbon", 1649),
+    ("HP", "EliteBook 840", 1199),
+    ("Logitech", "MX Master 3S", 99),
+]
+
+BUYER_LINES = [
+    "That's above our budget. Could you do ${price}?",
+    "We're comparing a few vendors. Would ${price} work for you?",
+    "If we order ten units, can you meet us at ${price}?",
+    "I can get approval for ${price} today.",
+]
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+class Recorder:
+    def __init__(self):
+        self.turn_latencies = []
+        self.ttfts = []
+        self.errors = 0
+        self.turns = 0
+        self._lock = threading.Lock()
+
+    def record(self, latency, ttft):
+        with self._lock:
+            self.turns += 1
+            self.turn_latencies.append(latency)
+            if ttft is not None:
+                self.ttfts.append(ttft)
+
+    def fail(self):
+        with self._lock:
+            self.errors += 1
+
+
+# One streamed vendor turn; returns (result, turn latency, time to first token)
+def timed_turn(fn, *args, **kwargs):
+    started = time.perf_counter()
+    first = []
+
+    def on_delta(_):
+        if not first:
+            first.append(time.perf_counter())
+
+    result = fn(*args, stream=True, on_delta=on_delta, **kwargs)
+    finished = time.perf_counter()
+    return result, finished - started, (first[0] - started) if first else None
+
+
+def run_buyer(
+    client, buyer_id, turns, strategy_every, template_opening, recorder, sessions, reply_cache=None, engine=None
+):
+    rng = random.Random(buyer_id)
+    vendor, product, price = rng.choice(SCENARIOS)
+    session = NegotiationSession(
+        client, vendor, product, price, context=ConversationContext.from_env(), reply_cache=reply_cache, engine=engine
+    )
+    sessions.append(session)
+
+    try:
+        _, latency, ttft = timed_turn(session.open, template=template_opening)
+        recorder.record(latency, ttft)
+    except Exception:
+        recorder.fail()
+        return
+
+    for turn in range(1, turns + 1):
+        try:
+            if strategy_every and turn % strategy_every == 0:
+                message = session.suggest_strategy().message
+            else:
+                target = (session.current_offer or price) * rng.uniform(0.8, 0.92)
+                message = rng.choice(BUYER_LINES).format(price=f"{target:,.0f}")
+            _, latency, ttft = timed_turn(session.reply, message)
+            recorder.record(latency, ttft)
+        except Exception:
+            recorder.fail()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--buyers", type=int, default=20, help="concurrent buyers")
+    parser.add_argument("--turns", type=int, default=5, help="buyer messages per negotiation")
+    parser.add_argument("--strategy-every", type=int, default=3, help="use a strategy suggestion every N turns (0 = never)")
+    parser.add_argument("--opening", choices=("template", "llm"), default="llm", help="how the vendor's opening quote is produced")
+    parser.add_argument("--reply-cache", action="store_true", help="serve near-identical buyer messages from the vendor reply cache")
+    parser.add_argument("--vendor-engine", choices=MODES, default="fallback", help="who plays the vendor (practice = local engine only)")
+    parser.add_argument("--time-scale", type=float, default=None, help="multiply all simulated delays (overrides FAKE_LLM_TIME_SCALE)")
+    args = parser.parse_args()
+
+    backend = FakeBackend.from_env()
+    if args.time_scale is not None:
+        backend.time_scale = args.time_scale
+    # Limits high enough that the harness measures the app, not the token buckets
+    client = LLMClient(backend, requests_per_minute=1_000_000, tokens_per_minute=1_000_000_000, base_delay=0.05)
+
+    reply_cache = VendorReplyCache.from_env() if args.reply_cache else None
+    recorder = Recorder()
+    sessions = []
+    tracemalloc.start()
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.buyers) as pool:
+        for buyer_id in range(args.buyers):
+            pool.submit(
+                run_buyer, client, buyer_id, args.turns, args.strategy_every, args.opening == "template", recorder,
+                sessions, reply_cache, VendorEngine(mode=args.vendor_engine)
+            )
+    elapsed = time.perf_counter() - started
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    latencies = [t * 1000 for t in recorder.turn_latencies]
+    ttfts = [t * 1000 for t in recorder.ttfts]
+    print(f"buyers={args.buyers} turns/buyer={args.turns + 1} elapsed={elapsed:.2f}s "
+          f"(time scale {backend.time_scale:g}, median TTFT {backend.ttft_ms:g}ms, {backend.tokens_per_second:g} tok/s)")
+    print(f"turns completed: {recorder.turns}, failed: {recorder.errors}, throughput: {recorder.turns / elapsed:.1f} turns/s")
+    print(f"{'':16}{'p50':>10}{'p95':>10}{'p99':>10}{'mean':>10}")
+    for label, values in (("turn latency ms", latencies), ("TTFT ms", ttfts)):
+        mean = statistics.fmean(values) if values else 0.0
+        print(f"{label:16}{percentile(values, 50):>10.1f}{percentile(values, 95):>10.1f}"
+              f"{percentile(values, 99):>10.1f}{mean:>10.1f}")
+    if reply_cache is not None:
+        print(f"vendor reply cache: {reply_cache.hit_rate:.0%} hit rate "
+              f"({reply_cache.hits}/{reply_cache.hits + reply_cache.misses} lookups)")
+    if sessions:
+        print(f"memory per session: {current / len(sessions) / 1024:.1f} KiB retained, "
+              f"{peak / len(sessions) / 1024:.1f} KiB peak")
+
+    # Which call kinds dominate time and (projected, at the requested models' list prices) spend
+    print(f"\n{'task':16}{'calls':>7}{'p50 s':>8}{'p95 s':>8}{'total s':>9}{'tokens':>9}{'cost $':>9}")
+    for row in client.metrics.summary():
+        tokens = row["prompt tokens"] + row["completion tokens"]
+        print(f"{row['task']:16}{row['calls']:>7}{row['p50 s'] or 0:>8.2f}{row['p95 s'] or 0:>8.2f}"
+              f"{row['total s']:>9.1f}{tokens:>9}{row['cost $']:>9.4f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,32 @@
+"""Accuracy gate (and, with pytest-benchmark installed, timing) for price extraction.
+
+Run from the repository root:
+
+    python -m pytest benchmarks/test_price_extraction.py [--benchmark-only]
+
+Every corpus message in bench_price_extraction must resolve to its expected offer, so an
+accuracy drop fails the run instead of only showing up in the printed benchmark table.
+"""
+import pytest
+
+from bench_price_extraction import CORPUS, current
+
+try:
+    import pytest_benchmark  # noqa: F401
+    HAVE_BENCHMARK = True
+except ImportError:
+    HAVE_BENCHMARK = False
+
+
+@pytest.mark.parametrize("message, expected", CORPUS)
+def test_extracts_current_offer(message, expected):
+    assert current(message) == expected
+
+
+def extract_corpus():
+    return [current(message) for message, _ in CORPUS]
+
+
+@pytest.mark.skipif(not HAVE_BENCHMARK, reason="needs pytest-benchmark")
+def test_extraction_speed(benchmark):
+    assert benchmark(extract_corpus) == [expected for _, expected in CORPUS]
@@ -0,0 +1,167 @@
+import csv
+import hashlib
+import os
+import sqlite3
+import threading
+
+DEFAULT_CATALOG_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "catalog.csv")
+
+# Bump when the index schema changes so existing index files are rebuilt
+INDEX_VERSION = 1
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS brands (
+    name TEXT PRIMARY KEY,
+    name_key TEXT NOT NULL,
+    products INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS brands_key ON brands (name_key);
+CREATE TABLE IF NOT EXISTS products (
+    brand TEXT NOT NULL,
+    name TEXT NOT NULL,
+    name_key TEXT NOT NULL,
+    price REAL NOT NULL,
+    PRIMARY KEY (brand, name)
+);
+CREATE INDEX IF NOT EXISTS products_brand_key ON products (brand, name_key);
+"""
+
+# Upper bound for a case-insensitive prefix range scan: every key starting with
+# `prefix` sorts before prefix + this
+_PREFIX_END = "\U0010ffff"
+
+BATCH_ROWS = 5000
+
+
+def source_signature(path):
+    stat = os.stat(path)
+    return f"{INDEX_VERSION}:{os.path.abspath(path)}:{stat.st_size}:{stat.st_mtime_ns}"
+
+
+# Rows of (brand, product, price) from a CSV or Parquet file with those three columns
+def read_catalog_rows(path):
+    if path.lower().endswith((".parquet", ".pq")):
+        # Imported here so CSV catalogs (and every app start) skip loading pyarrow
+        try:
+            import pyarrow.parquet as pq
+        except ImportError as e:  # Parquet catalogs need pyarrow; CSV works without it
+            raise RuntimeError("Reading a Parquet catalog needs the pyarrow package") from e
+        parquet = pq.ParquetFile(path)
+        for batch in parquet.iter_batches(columns=["brand", "product", "price"], batch_size=BATCH_ROWS):
+            columns = batch.to_pydict()
+            yield from zip(columns["brand"], columns["product"], columns["price"])
+        return
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        for row in csv.DictReader(f):
+            yield row["brand"], row["product"], row["price"]
+
+
+def _prefix_range(prefix):
+    key = (prefix or "").strip().lower()
+    return key, key + _PREFIX_END
+
+
+# Brand -> product catalog backed by an SQLite index built once from a CSV/Parquet source.
+# The index lives next to the other caches and is reused across restarts until the source's
+# size or mtime changes; lookups are indexed range scans, so nothing scales with catalog
+# size per rerun. Brand and product names match case-insensitively by prefix.
+class Catalog:
+    def __init__(self, source_path, index_dir=os.path.join(".cache", "catalog")):
+        self.source_path = source_path
+        self.signature = source_signature(source_path)
+        os.makedirs(index_dir, exist_ok=True)
+        digest = hashlib.sha256(os.path.abspath(source_path).encode("utf-8")).hexdigest()[:16]
+        self.index_path = os.path.join(index_dir, f"{digest}.sqlite3")
+        self._lock = threading.Lock()
+        self._conn = self._open_index()
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            os.getenv("CATALOG_PATH", DEFAULT_CATALOG_PATH),
+            index_dir=os.getenv("CATALOG_INDEX_DIR", os.path.join(".cache", "catalog")),
+        )
+
+    def _open_index(self):
+        conn = sqlite3.connect(self.index_path, check_same_thread=False, isolation_level=None, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript(SCHEMA)
+        row = conn.execute("SELECT value FROM meta WHERE key = 'signature'").fetchone()
+        if row is None or row[0] != self.signature:
+            self._build(conn)
+        return conn
+
+    def _build(self, conn):
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            # Another process may have rebuilt the index while we waited for the write lock
+            row = conn.execute("SELECT value FROM meta WHERE key = 'signature'").fetchone()
+            if row is not None and row[0] == self.signature:
+                conn.execute("COMMIT")
+                return
+            conn.execute("DELETE FROM products")
+            conn.execute("DELETE FROM brands")
+            batch = []
+            for brand, product, price in read_catalog_rows(self.source_path):
+                brand, product = str(brand).strip(), str(product).strip()
+                if not brand or not product or price in (None, ""):
+                    continue
+                batch.append((brand, product, product.lower(), float(price)))
+                if len(batch) >= BATCH_ROWS:
+                    conn.executemany("INSERT OR REPLACE INTO products VALUES (?, ?, ?, ?)", batch)
+                    batch = []
+            conn.executemany("INSERT OR REPLACE INTO products VALUES (?, ?, ?, ?)", batch)
+            conn.execute(
+                "INSERT INTO brands (name, name_key, products) "
+                "SELECT brand, lower(brand), COUNT(*) FROM products GROUP BY brand"
+            )
+            conn.execute("INSERT OR REPLACE INTO meta VALUES ('signature', ?)", (self.signature,))
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def _query(self, sql, params):
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+
+    def brand_count(self, prefix=""):
+        low, high = _prefix_range(prefix)
+        return self._query("SELECT COUNT(*) FROM brands WHERE name_key >= ? AND name_key < ?", (low, high))[0][0]
+
+    # One page of brand names matching `prefix`, alphabetically
+    def brands(self, prefix="", offset=0, limit=50):
+        low, high = _prefix_range(prefix)
+        rows = self._query(
+            "SELECT name FROM brands WHERE name_key >= ? AND name_key < ? ORDER BY name_key LIMIT ? OFFSET ?",
+            (low, high, limit, offset),
+        )
+        return [name for (name,) in rows]
+
+    def product_count(self, brand, prefix=""):
+        low, high = _prefix_range(prefix)
+        return self._query(
+            "SELECT COUNT(*) FROM products WHERE brand = ? AND name_key >= ? AND name_key < ?", (brand, low, high)
+        )[0][0]
+
+    # One page of `brand`'s product names matching `prefix`, alphabetically
+    def products(self, brand, prefix="", offset=0, limit=50):
+        low, high = _prefix_range(prefix)
+        rows = self._query(
+            "SELECT name FROM products WHERE brand = ? AND name_key >= ? AND name_key < ? "
+            "ORDER BY name_key LIMIT ? OFFSET ?",
+            (brand, low, high, limit, offset),
+        )
+        return [name for (name,) in rows]
+
+    def has_brand(self, brand):
+        return bool(self._query("SELECT 1 FROM brands WHERE name = ?", (brand,)))
+
+    # List price of a product, or None if the brand/product pair isn't in the catalog
+    def price(self, brand, product):
+        rows = self._query("SELECT price FROM products WHERE brand = ? AND name = ?", (brand, product))
+        return rows[0][0] if rows else None
+
+    def __len__(self):
+        return self._query("SELECT COUNT(*) FROM products", ())[0][0]
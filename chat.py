@@ -0,0 +1,187 @@
+import enum
+import json
+import os
+import uuid
+from dataclasses import dataclass
+
+
+class Role(enum.Enum):
+    SYSTEM = "system"
+    BUYER = "buyer"
+    VENDOR = "vendor"
+
+
+@dataclass(frozen=True, slots=True)
+class ChatMessage:
+    role: Role
+    text: str
+    # Vendor name for vendor turns; kept apart from the text so one string is shared per session
+    speaker: str | None = None
+
+    # Transcript form used in prompts: "Buyer: ..." / "Vendor (Apple): ..."
+    @property
+    def content(self):
+        if self.role is Role.BUYER:
+            return f"Buyer: {self.text}"
+        if self.role is Role.VENDOR:
+            return f"Vendor ({self.speaker}): {self.text}"
+        return self.text
+
+    def to_json(self):
+        return json.dumps({"role": self.role.value, "text": self.text, "speaker": self.speaker})
+
+    @classmethod
+    def from_json(cls, line):
+        data = json.loads(line)
+        return cls(role=Role(data["role"]), text=data["text"], speaker=data.get("speaker"))
+
+
+# Buyer/vendor turns of a ChatLog (everything after the system prompt), indexed from 0
+class TurnView:
+    __slots__ = ("log",)
+
+    def __init__(self, log):
+        self.log = log
+
+    def __len__(self):
+        return len(self.log) - 1
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            start, stop, step = index.indices(len(self))
+            return self.log[start + 1:stop + 1:step]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("turn index out of range")
+        return self.log[index + 1]
+
+    def __iter__(self):
+        return iter(self[:])
+
+
+# Negotiation transcript: the system prompt followed by buyer/vendor turns, indexed like the
+# plain message list it replaces (index 0 is the system prompt). With `max_messages` set, the
+# oldest turns leave memory once the cap is exceeded: appended to a JSONL archive when
+# `archive_path` is set (and read back only if something asks for them), otherwise dropped,
+# leaving the rolling ConversationContext summary as their only record.
+class ChatLog:
+    def __init__(self, system_prompt, max_messages=None, archive_path=None):
+        self.system = ChatMessage(Role.SYSTEM, system_prompt)
+        self.max_messages = max_messages or None
+        self.archive_path = archive_path
+        # Absolute index of the first turn still held in memory
+        self.offset = 1
+        self._turns = []
+
+    @classmethod
+    def from_env(cls, system_prompt):
+        archive_dir = os.getenv("CHAT_ARCHIVE_DIR", os.path.join(".cache", "transcripts"))
+        return cls(
+            system_prompt,
+            max_messages=int(os.getenv("CHAT_MAX_MESSAGES", "100")),
+            archive_path=os.path.join(archive_dir, f"{uuid.uuid4().hex}.jsonl") if archive_dir else None,
+        )
+
+    def __len__(self):
+        return self.offset + len(self._turns)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            indices = range(*index.indices(len(self)))
+            archived = None
+            if indices and self.offset > 1:
+                low, high = min(indices[0], indices[-1]), max(indices[0], indices[-1])
+                if low < self.offset and high >= 1:
+                    archived = self._archived()
+            return [m for m in (self._get(i, archived) for i in indices) if m is not None]
+        if index < 0:
+            index += len(self)
+        message = self._get(index, None)
+        if message is None:
+            raise IndexError("chat message index out of range or no longer stored")
+        return message
+
+    def _get(self, index, archived):
+        if index == 0:
+            return self.system
+        if index >= self.offset:
+            return self._turns[index - self.offset] if index < len(self) else None
+        if archived is None:
+            archived = self._archived()
+        return archived[index - 1] if index - 1 < len(archived) else None
+
+    def __setitem__(self, index, message):
+        if index < 0:
+            index += len(self)
+        if not self.offset <= index < len(self):
+            raise IndexError("only turns still held in memory can be replaced")
+        self._turns[index - self.offset] = message
+
+    def __iter__(self):
+        return iter(self[:])
+
+    @property
+    def turns(self):
+        return TurnView(self)
+
+    # Turns still held in memory, oldest first
+    @property
+    def retained(self):
+        return list(self._turns)
+
+    def append(self, role, text, speaker=None):
+        message = ChatMessage(role, text, speaker)
+        self._turns.append(message)
+        # Evict in batches (cap + 25%) so a long chat doesn't touch the archive on every turn
+        if self.max_messages and len(self._turns) > self.max_messages + self.max_messages // 4:
+            self._evict(len(self._turns) - self.max_messages)
+        return message
+
+    def _evict(self, count):
+        evicted, self._turns = self._turns[:count], self._turns[count:]
+        if self.archive_path:
+            os.makedirs(os.path.dirname(self.archive_path) or ".", exist_ok=True)
+            with open(self.archive_path, "a", encoding="utf-8") as f:
+                f.writelines(message.to_json() + "\n" for message in evicted)
+        self.offset += count
+
+    def _archived(self):
+        if not self.archive_path or not os.path.exists(self.archive_path):
+            return []
+        with open(self.archive_path, encoding="utf-8") as f:
+            return [ChatMessage.from_json(line) for line in f if line.strip()]
+
+    # Cheap snapshot for background jobs: messages are immutable, so only the list is copied
+    def copy(self):
+        clone = ChatLog.__new__(ChatLog)
+        clone.system = self.system
+        clone.max_messages = self.max_messages
+        clone.archive_path = self.archive_path
+        clone.offset = self.offset
+        clone._turns = list(self._turns)
+        return clone
+
+    # Remove the archive file once the transcript is no longer needed
+    def discard_archive(self):
+        if self.archive_path and os.path.exists(self.archive_path):
+            os.remove(self.archive_path)
+
+
+# Chat-bubble HTML for a transcript, rendered once per message and joined into a single block
+# so a rerun sends one element instead of one per turn. Only messages it hasn't rendered
+# before (new turns, or a replaced opening quote) go through `render`.
+class RenderedTranscript:
+    def __init__(self):
+        self._messages = []
+        self._parts = []
+        self._html = ""
+
+    def sync(self, messages, render):
+        if len(messages) == len(self._messages) and all(a is b for a, b in zip(messages, self._messages)):
+            return self._html
+        cached = {id(message): part for message, part in zip(self._messages, self._parts)}
+        self._parts = [cached.get(id(message)) or render(message) for message in messages]
+        self._messages = list(messages)
+        self._html = "".join(self._parts)
+        return self._html
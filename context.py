@@ -0,0 +1,92 @@
+import functools
+import os
+import threading
+
+try:
+    import tiktoken
+except ImportError:  # fall back to the character-based estimate below
+    tiktoken = None
+
+
+# tiktoken encoding for `model`, or None when it can't be loaded (e.g. an offline pod that
+# can't download the encoding file); cached either way so a failure isn't retried per call
+@functools.lru_cache(maxsize=8)
+def _encoding(model):
+    try:
+        try:
+            return tiktoken.encoding_for_model(model)
+        except KeyError:
+            return tiktoken.get_encoding("cl100k_base")
+    except Exception:
+        return None
+
+
+# Count tokens with tiktoken when available, otherwise estimate ~4 characters per token
+def count_tokens(text, model="gpt-4"):
+    if not text:
+        return 0
+    encoding = _encoding(model) if tiktoken is not None else None
+    if encoding is not None:
+        return len(encoding.encode(text))
+    return (len(text) + 3) // 4
+
+
+# Default turn formatter: the transcript form "Buyer: ..." / "Vendor (X): ..."
+def format_turn(msg):
+    return msg.content
+
+
+# Token-budgeted view of a negotiation transcript: a rolling summary of older turns
+# plus the most recent turns verbatim. `messages` is a ChatLog's turns (no system prompt).
+class ConversationContext:
+    def __init__(self, token_budget=1500, recent_turns=6, model="gpt-4"):
+        self.token_budget = token_budget
+        self.recent_turns = recent_turns
+        self.model = model
+        self.summary = ""
+        # Number of leading transcript messages already folded into `summary`
+        self.summarized_upto = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            token_budget=int(os.getenv("CONTEXT_TOKEN_BUDGET", "1500")),
+            recent_turns=int(os.getenv("CONTEXT_RECENT_TURNS", "6")),
+        )
+
+    # Render the summary and as many recent turns as fit in the budget, oldest dropped first
+    def render(self, messages, formatter=format_turn, token_budget=None):
+        budget = token_budget or self.token_budget
+        summary, summarized_upto = self.summary, self.summarized_upto
+
+        header = f"Summary of earlier conversation: {summary}\n" if summary else ""
+        remaining = budget - count_tokens(header, self.model)
+
+        # Turns not yet covered by the summary stay eligible even if they fall outside the window
+        start = min(summarized_upto, max(0, len(messages) - self.recent_turns))
+        lines = []
+        for msg in reversed(messages[start:]):
+            line = formatter(msg)
+            cost = count_tokens(line, self.model) + 1
+            if cost > remaining and lines:
+                break
+            lines.append(line)
+            remaining -= cost
+        lines.reverse()
+
+        if header and lines:
+            return header + "Recent turns:\n" + "\n".join(lines)
+        return header + "\n".join(lines)
+
+    # Fold turns that have left the recent window into the rolling summary.
+    # `summarize(prior_summary, turns_text)` returns the updated summary text.
+    def update(self, messages, summarize):
+        with self._lock:
+            target = len(messages) - self.recent_turns
+            if target <= self.summarized_upto:
+                return False
+            turns_text = "\n".join(format_turn(msg) for msg in messages[self.summarized_upto:target])
+            self.summary = summarize(self.summary, turns_text)
+            self.summarized_upto = target
+            return True
@@ -0,0 +1,249 @@
+import json
+import os
+import random
+import re
+import threading
+import time
+
+from llm import Completion, DeltaStream, LLMRateLimitError
+from pricing import extract_buyer_offer, extract_price_from_message, format_price
+
+# Prompt fragments the fake reads to stay in character (see the builders in negotiation.py)
+QUOTE_PRICE = re.compile(r"(?:Mention the|Keep the price exactly) \$(\d[\d,]*(?:\.\d+)?)")
+ASKING_PRICE = re.compile(r"asking price of \$(\d[\d,]*(?:\.\d+)?)")
+STRATEGY_PRICE = re.compile(r"negotiation with .+? for .+? at \$(\d[\d,]*(?:\.\d+)?)")
+ENGINE_DECISION = re.compile(r"decision for this turn is already made: (close the deal at|offer exactly) \$(\d[\d,]*(?:\.\d+)?)")
+TARGET_PRICE = re.compile(r"target price is \$(\d[\d,]*(?:\.\d+)?)")
+BUYER_SAID = re.compile(r'The buyer just said: "(.*)"')
+VENDOR_LINE = re.compile(r"^\s*(?:You \(vendor\) said|Vendor \([^)]*\)):\s*(.*)$", re.MULTILINE)
+INSIGHTS_CONTEXT = re.compile(r"Context: (.+?) \| (.+?) \| \$(\d[\d,]*(?:\.\d+)?)")
+TRAJECTORY_OFFERS = re.compile(r"^\s*Offers in order: (.+)$", re.MULTILINE)
+PRODUCT_NAME = re.compile(r"(?:discuss purchasing|the sale of|interested in) (.+?)(?: with an asking|\.)")
+
+OPENERS = [
+    "Thanks for reaching out about our {product}! We're offering it at ${price}.",
+    "Hi! Our {product} is available at ${price}, and it's a great value for the quality.",
+    "Great to hear from you. The {product} comes in at ${price} right now.",
+]
+COUNTERS = [
+    "I hear you, but the best I can do is ${price}.",
+    "We have some room - I can come down to ${price}.",
+    "That's a bit low for us. How about ${price}?",
+    "I could do ${price} if you can commit this quarter.",
+]
+ACCEPTS = [
+    "You drive a hard bargain - ${price} works for us.",
+    "Okay, ${price} it is. Let's get the paperwork going.",
+]
+
+
+def _number(text):
+    return float(text.replace(",", "")) if text else None
+
+
+def _find_price(pattern, prompt, default=100.0):
+    match = pattern.search(prompt)
+    return _number(match.group(1)) if match else default
+
+
+def _format_price(value):
+    return format_price(value, symbol="")
+
+
+def _round_price(value, asking):
+    return round(value / 5) * 5 if asking >= 100 else round(value, 2)
+
+
+# Deterministic, offline stand-in for the OpenAI backend. Replies are scripted per task
+# (vendor quotes and counter-offers carry real prices), latency follows a log-normal
+# time-to-first-token plus a fixed token rate, and a configurable share of calls fail
+# with a rate-limit error. The same seed and prompt always produce the same response.
+class FakeBackend:
+    def __init__(
+        self,
+        seed=0,
+        ttft_ms=400.0,
+        ttft_sigma=0.5,
+        tokens_per_second=40.0,
+        error_rate=0.0,
+        time_scale=1.0,
+    ):
+        self.seed = seed
+        self.ttft_ms = ttft_ms
+        self.ttft_sigma = ttft_sigma
+        self.tokens_per_second = tokens_per_second
+        self.error_rate = error_rate
+        self.time_scale = time_scale
+        # Separate sequence for injected errors so a retried prompt isn't doomed to fail again
+        self._errors = random.Random(seed)
+        self._errors_lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            seed=int(os.getenv("FAKE_LLM_SEED", "0")),
+            ttft_ms=float(os.getenv("FAKE_LLM_TTFT_MS", "400")),
+            ttft_sigma=float(os.getenv("FAKE_LLM_TTFT_SIGMA", "0.5")),
+            tokens_per_second=float(os.getenv("FAKE_LLM_TOKENS_PER_SEC", "40")),
+            error_rate=float(os.getenv("FAKE_LLM_ERROR_RATE", "0")),
+            time_scale=float(os.getenv("FAKE_LLM_TIME_SCALE", "1")),
+        )
+
+    def _rng(self, task, messages):
+        return random.Random(f"{self.seed}:{task}:{messages[-1]['content']}")
+
+    def _sleep(self, seconds):
+        if seconds > 0 and self.time_scale > 0:
+            time.sleep(seconds * self.time_scale)
+
+    def _begin(self, rng):
+        # Time to first token (median ttft_ms), then maybe a transient failure
+        self._sleep(rng.lognormvariate(0, self.ttft_sigma) * self.ttft_ms / 1000)
+        with self._errors_lock:
+            failed = self._errors.random() < self.error_rate
+        if failed:
+            raise LLMRateLimitError("Simulated rate limit from the fake LLM backend")
+
+    def complete(self, task, messages, **kwargs):
+        rng = self._rng(task, messages)
+        self._begin(rng)
+        text = self._respond(task, messages[-1]["content"], rng, kwargs)
+        tokens = _tokens(text)
+        self._sleep(len(tokens) / self.tokens_per_second)
+        return Completion(
+            text=text,
+            model=kwargs.get("model", "fake"),
+            prompt_tokens=len(messages[-1]["content"]) // 4,
+            completion_tokens=len(tokens),
+        )
+
+    def open_stream(self, task, messages, **kwargs):
+        rng = self._rng(task, messages)
+        self._begin(rng)
+        text = self._respond(task, messages[-1]["content"], rng, kwargs)
+        tokens = _tokens(text)
+        stream = DeltaStream(
+            model=kwargs.get("model", "fake"),
+            prompt_tokens=len(messages[-1]["content"]) // 4,
+            completion_tokens=len(tokens),
+        )
+
+        def deltas():
+            for token in tokens:
+                self._sleep(1 / self.tokens_per_second)
+                yield token
+
+        stream.deltas = deltas()
+        return stream
+
+    # ---- Scripted responses ----
+
+    def _respond(self, task, prompt, rng, kwargs):
+        structured = "response_format" in kwargs
+        if task == "vendor_quote":
+            return self._vendor_quote(prompt, rng)
+        if task == "vendor_reply":
+            return self._vendor_reply(prompt, rng, structured)
+        if task == "strategy":
+            return self._strategy(prompt, rng)
+        if task in ("summary", "context_summary"):
+            return self._summary(prompt)
+        if task == "insights":
+            return self._insights(prompt, rng)
+        return "Understood."
+
+    def _vendor_quote(self, prompt, rng):
+        price = _find_price(QUOTE_PRICE, prompt)
+        product = PRODUCT_NAME.search(prompt)
+        return rng.choice(OPENERS).format(
+            product=product.group(1) if product else "product", price=_format_price(price)
+        )
+
+    def _vendor_reply(self, prompt, rng, structured):
+        asking = _find_price(ASKING_PRICE, prompt)
+        buyer = BUYER_SAID.search(prompt)
+        buyer_offer = extract_buyer_offer(buyer.group(1)) if buyer else None
+
+        # Current position: the vendor's last stated price, else the asking price
+        last = asking
+        for line in VENDOR_LINE.findall(prompt):
+            match = extract_price_from_message(line)
+            if match:
+                last = match.value
+
+        # Reservation price and concession rate are fixed per product so sessions are consistent
+        persona = random.Random(f"{self.seed}:{asking}")
+        floor = asking * (1 - persona.uniform(0.08, 0.2))
+        counter = max(floor, last - (last - floor) * rng.uniform(0.25, 0.5))
+        counter = _round_price(counter, asking)
+
+        decision = ENGINE_DECISION.search(prompt)
+        if decision:
+            # Hybrid mode: the price is fixed by the engine, only the wording is ours
+            accepted = decision.group(1).startswith("close")
+            offer, text = _number(decision.group(2)), rng.choice(ACCEPTS if accepted else COUNTERS)
+        elif buyer_offer is not None and buyer_offer.value >= counter:
+            offer, text = min(buyer_offer.value, last), rng.choice(ACCEPTS)
+        else:
+            offer, text = counter, rng.choice(COUNTERS)
+        text = text.format(price=_format_price(offer))
+        if structured:
+            return json.dumps({"reply": text, "offer": offer})
+        return text
+
+    def _strategy(self, prompt, rng):
+        asking = _find_price(STRATEGY_PRICE, prompt)
+        current = asking
+        for line in VENDOR_LINE.findall(prompt):
+            match = extract_price_from_message(line)
+            if match:
+                current = match.value
+        target = _round_price(current * rng.uniform(0.88, 0.95), asking)
+        ceiling = _find_price(TARGET_PRICE, prompt, default=None)
+        if ceiling is not None:
+            target = min(target, ceiling)
+        return json.dumps({
+            "strategy": "Acknowledge the movement, anchor below their number and tie any concession to volume.",
+            "message": f"I appreciate the flexibility. If we place the order this week, could you do ${_format_price(target)}?",
+        })
+
+    def _summary(self, prompt):
+        precomputed = TRAJECTORY_OFFERS.search(prompt)
+        if precomputed:
+            movement = precomputed.group(1)
+        else:
+            prices = [m.value for m in map(extract_price_from_message, prompt.splitlines()) if m]
+            movement = " -> ".join(f"${_format_price(p)}" for p in prices[-6:]) or "no prices discussed"
+        return (
+            "- **Key Discussion Points**: price and commitment timing\n"
+            f"- **Price Movement**: {movement}\n"
+            "- **Next Steps/Action Items**: confirm volume and close"
+        )
+
+    def _insights(self, prompt, rng):
+        context = INSIGHTS_CONTEXT.search(prompt)
+        vendor, product, price = (context.group(1), context.group(2), _number(context.group(3))) if context else ("Vendor", "Product", 100.0)
+        low, high = _format_price(price * 0.85), _format_price(price * 1.05)
+        return f"""### Market Intelligence Brief:
+{product} pricing is stable; {vendor} has room to discount for volume commitments.
+
+### Current Market Rates:
+Brand | Model | Price Range | Notes
+--- | --- | --- | ---
+{vendor} | {product} | ${low}-${high} | Reference range
+Competitor A | Comparable | ${_format_price(price * 0.9)} | Similar spec
+
+### Competitor Comparison:
+Vendor | Unit Price | Key Advantage | Delivery
+--- | --- | --- | ---
+Competitor A | ${_format_price(price * 0.9)} | Price | 5 days
+
+### Negotiation Tips:
+- Anchor around ${low}
+- Trade volume for price
+"""
+
+
+# Split text into ~4-character pseudo-tokens for pacing the stream
+def _tokens(text):
+    return [text[i:i + 4] for i in range(0, len(text), 4)] or [""]
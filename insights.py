@@ -0,0 +1,90 @@
+import re
+from dataclasses import dataclass
+
+# "### Section Name:" headings as requested by the insights prompt
+SECTION_HEADING = re.compile(r"^\s*#{2,4}\s*(?P<title>[^\n]+?)\s*:?\s*$", re.MULTILINE)
+TABLE_SEPARATOR = re.compile(r"^\|?\s*:?-{3,}:?\s*(?:\|\s*:?-{3,}:?\s*)*\|?$")
+NUMERIC_CELL = re.compile(r"^[$€£]?\s?-?\d[\d,]*(?:\.\d+)?\s?%?$")
+
+NO_DATA = "No data available."
+
+
+@dataclass(frozen=True)
+class MarkdownTable:
+    columns: tuple
+    rows: tuple
+    markdown: str
+
+    # Rows as dicts for st.dataframe; all-numeric columns become numbers so they sort properly
+    def records(self):
+        numeric = [
+            all(NUMERIC_CELL.match(row[i]) for row in self.rows if row[i]) and any(row[i] for row in self.rows)
+            for i in range(len(self.columns))
+        ]
+        records = []
+        for row in self.rows:
+            record = {}
+            for i, column in enumerate(self.columns):
+                cell = row[i]
+                if numeric[i] and cell:
+                    cell = float(re.sub(r"[^\d.\-]", "", cell))
+                record[column] = cell
+            records.append(record)
+        return records
+
+
+@dataclass(frozen=True)
+class InsightsReport:
+    raw: str
+    brief: str
+    rates: MarkdownTable
+    competitors: MarkdownTable
+    tips: str
+
+
+def _split_row(line):
+    line = line.strip()
+    if line.startswith("|"):
+        line = line[1:]
+    if line.endswith("|"):
+        line = line[:-1]
+    return [cell.strip() for cell in line.split("|")]
+
+
+# Parse the first pipe table in a section; non-table lines (notes, placeholders) are ignored
+def parse_markdown_table(text):
+    lines = [line for line in text.splitlines() if "|" in line]
+    columns, rows = None, []
+    for line in lines:
+        if TABLE_SEPARATOR.match(line.strip()):
+            continue
+        cells = _split_row(line)
+        if columns is None:
+            columns = tuple(cells)
+            continue
+        # Models often miscount separators/cells; pad or trim to the header width
+        cells = (cells + [""] * len(columns))[:len(columns)]
+        if any(cells):
+            rows.append(tuple(cells))
+    return MarkdownTable(columns=columns or (), rows=tuple(rows), markdown=text.strip() or NO_DATA)
+
+
+# Split the report into {section title: body} in one pass over the headings
+def split_sections(text):
+    sections = {}
+    matches = list(SECTION_HEADING.finditer(text))
+    for i, match in enumerate(matches):
+        end = matches[i + 1].start() if i + 1 < len(matches) else len(text)
+        sections[match.group("title").strip().rstrip(":").lower()] = text[match.end():end].strip()
+    return sections
+
+
+def parse_insights_report(text):
+    sections = split_sections(text or "")
+    return InsightsReport(
+        raw=text,
+        brief=sections.get("market intelligence brief") or NO_DATA,
+        rates=parse_markdown_table(sections.get("current market rates", "")),
+        competitors=parse_markdown_table(sections.get("competitor comparison", "")),
+        tips=sections.get("negotiation tips") or NO_DATA,
+    )
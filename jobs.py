@@ -0,0 +1,103 @@
+import itertools
+import threading
+import time
+
+QUEUED, RUNNING, DONE, FAILED, CANCELLED = "queued", "running", "done", "failed", "cancelled"
+
+_job_ids = itertools.count(1)
+
+
+# One unit of background LLM work. Workers stream partial text into `partial`;
+# the script thread polls `status` and reads `result` / `error` once finished.
+class Job:
+    def __init__(self, kind, meta=None):
+        self.id = next(_job_ids)
+        self.kind = kind
+        self.meta = meta or {}
+        self.status = QUEUED
+        self.partial = ""
+        self.result = None
+        self.error = None
+        self.submitted_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.future = None
+
+    @property
+    def finished(self):
+        return self.status in (DONE, FAILED, CANCELLED)
+
+    @property
+    def cancelled(self):
+        return self.status == CANCELLED
+
+    # Called from the worker with each streamed text delta
+    def append(self, text):
+        self.partial += text
+
+    def cancel(self):
+        if not self.finished:
+            self.status = CANCELLED
+            if self.future is not None:
+                self.future.cancel()
+
+    def _run(self, fn, args, kwargs):
+        if self.cancelled:
+            return
+        self.status = RUNNING
+        self.started_at = time.time()
+        try:
+            result = fn(self, *args, **kwargs)
+        except Exception as e:
+            # finished_at is set before the terminal status, so readers that see a finished job see both
+            self.finished_at = time.time()
+            if not self.cancelled:
+                self.error = e
+                self.status = FAILED
+        else:
+            self.finished_at = time.time()
+            if not self.cancelled:
+                self.result = result
+                self.status = DONE
+
+
+# Per-session set of named job slots backed by the shared worker pool. Submitting to a
+# slot cancels whatever was there, so each slot holds at most one live job.
+class JobQueue:
+    def __init__(self, executor):
+        self.executor = executor
+        self._slots = {}
+        self._lock = threading.Lock()
+
+    # Run `fn(job, *args, **kwargs)` in the background and track it under `slot`
+    def submit(self, slot, fn, *args, meta=None, **kwargs):
+        job = Job(slot, meta=meta)
+        self.put(slot, job)
+        job.future = self.executor.submit(job._run, fn, args, kwargs)
+        return job
+
+    # Track an existing (possibly already finished) job under `slot`
+    def put(self, slot, job):
+        with self._lock:
+            previous = self._slots.get(slot)
+            self._slots[slot] = job
+        if previous is not None and previous is not job:
+            previous.cancel()
+        return job
+
+    def get(self, slot):
+        return self._slots.get(slot)
+
+    def pop(self, slot):
+        with self._lock:
+            return self._slots.pop(slot, None)
+
+    def is_active(self, slot):
+        job = self._slots.get(slot)
+        return job is not None and not job.finished
+
+    def cancel_all(self):
+        with self._lock:
+            jobs, self._slots = list(self._slots.values()), {}
+        for job in jobs:
+            job.cancel()
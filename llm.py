@@ -0,0 +1,322 @@
+import os
+import random
+import threading
+import time
+from dataclasses import dataclass
+
+from metrics import LLMMetrics
+from routing import ModelRouter
+
+
+# Raised by backends for failures worth retrying that aren't OpenAI SDK errors
+class TransientLLMError(Exception):
+    pass
+
+
+# Raised by backends when a model's quota is exhausted; the client moves on to the next model
+class LLMRateLimitError(TransientLLMError):
+    pass
+
+
+# Errors that mean "this model is out of quota right now" rather than "this request failed";
+# backends add their SDK's equivalents through their `rate_limit_errors` attribute
+RATE_LIMIT_ERRORS = (LLMRateLimitError,)
+
+# Errors worth retrying; backends add their SDK's quota, timeout, connection and 5xx errors
+# through their `retryable_errors` attribute
+RETRYABLE_ERRORS = (TransientLLMError,)
+
+# Per-call timeouts (seconds) for each kind of request the app makes
+DEFAULT_TIMEOUTS = {
+    "vendor_quote": 20.0,
+    "vendor_reply": 20.0,
+    "strategy": 30.0,
+    "context_summary": 30.0,
+    "summary": 60.0,
+    "insights": 90.0,
+}
+
+
+# Rough token estimate (~4 characters per token) used to reserve TPM quota before a call
+def estimate_tokens(messages, max_tokens=None):
+    prompt_tokens = sum(len(m.get("content") or "") for m in messages) // 4
+    return prompt_tokens + (max_tokens or 500)
+
+
+# Thread-safe token bucket refilled continuously at `rate_per_minute`
+class TokenBucket:
+    def __init__(self, rate_per_minute):
+        self.capacity = float(rate_per_minute)
+        self.rate = self.capacity / 60.0
+        self.tokens = self.capacity
+        self.updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    # Reserve `amount` tokens and return how long the caller must wait before using them
+    def reserve(self, amount):
+        amount = min(float(amount), self.capacity)
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+            self.updated_at = now
+            self.tokens -= amount
+            if self.tokens >= 0:
+                return 0.0
+            return -self.tokens / self.rate
+
+
+# Request- and token-per-minute limiter; callers queue here instead of burning quota on 429s
+class RateLimiter:
+    def __init__(self, requests_per_minute, tokens_per_minute):
+        self.requests = TokenBucket(requests_per_minute) if requests_per_minute else None
+        self.tokens = TokenBucket(tokens_per_minute) if tokens_per_minute else None
+
+    def acquire(self, estimated_tokens):
+        wait = 0.0
+        if self.requests is not None:
+            wait = max(wait, self.requests.reserve(1))
+        if self.tokens is not None:
+            wait = max(wait, self.tokens.reserve(estimated_tokens))
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+
+# Result of a blocking completion, independent of the backend that produced it
+@dataclass(frozen=True)
+class Completion:
+    text: str
+    model: str
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+
+
+# Iterable of streamed text deltas; backends fill in token usage once the API reports it
+class DeltaStream:
+    def __init__(self, model=None, prompt_tokens=0, completion_tokens=0):
+        self.model = model
+        self.prompt_tokens = prompt_tokens
+        self.completion_tokens = completion_tokens
+        self.deltas = iter(())
+
+    def __iter__(self):
+        return iter(self.deltas)
+
+
+# Backend that talks to the OpenAI API over a tuned keep-alive connection pool. The SDK takes
+# about half a second to import, so it is loaded and the client built on the first call rather
+# than at startup; a missing API key surfaces as that call's error instead of an import failure.
+class OpenAIBackend:
+    def __init__(self, api_key, max_connections=50, max_keepalive_connections=20, keepalive_expiry=60.0):
+        self.api_key = api_key
+        self.max_connections = max_connections
+        self.max_keepalive_connections = max_keepalive_connections
+        self.keepalive_expiry = keepalive_expiry
+        self.retryable_errors = ()
+        self.rate_limit_errors = ()
+        self._sdk_client = None
+        self._lock = threading.Lock()
+
+    @property
+    def _client(self):
+        if self._sdk_client is None:
+            with self._lock:
+                if self._sdk_client is None:
+                    self._sdk_client = self._connect()
+        return self._sdk_client
+
+    def _connect(self):
+        import openai
+        try:
+            import httpx
+        except ImportError:  # newer openai releases ship their transport as httpx2
+            import httpx2 as httpx
+
+        # Quota pressure, timeouts, dropped connections and 5xx responses
+        self.retryable_errors = (
+            openai.RateLimitError,
+            openai.APITimeoutError,
+            openai.APIConnectionError,
+            openai.InternalServerError,
+        )
+        self.rate_limit_errors = (openai.RateLimitError,)
+        http_client = openai.DefaultHttpxClient(
+            limits=httpx.Limits(
+                max_connections=self.max_connections,
+                max_keepalive_connections=self.max_keepalive_connections,
+                keepalive_expiry=self.keepalive_expiry,
+            )
+        )
+        # Retries are handled by LLMClient so they can respect the shared rate limiter
+        return openai.OpenAI(api_key=self.api_key, http_client=http_client, max_retries=0)
+
+    def complete(self, task, messages, **kwargs):
+        response = self._client.chat.completions.create(messages=messages, **kwargs)
+        usage = response.usage
+        return Completion(
+            text=response.choices[0].message.content or "",
+            model=response.model,
+            prompt_tokens=usage.prompt_tokens if usage else 0,
+            completion_tokens=usage.completion_tokens if usage else 0,
+        )
+
+    # Send the request now (so connection and quota errors surface here) and return the delta iterator
+    def open_stream(self, task, messages, **kwargs):
+        response = self._client.chat.completions.create(
+            messages=messages, stream=True, stream_options={"include_usage": True}, **kwargs
+        )
+        stream = DeltaStream(model=kwargs.get("model"))
+
+        def deltas():
+            for chunk in response:
+                # With include_usage the last chunk has no choices, only the token counts
+                if chunk.usage:
+                    stream.model = chunk.model or stream.model
+                    stream.prompt_tokens = chunk.usage.prompt_tokens
+                    stream.completion_tokens = chunk.usage.completion_tokens
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+
+        stream.deltas = deltas()
+        return stream
+
+
+# Process-wide LLM client: rate limiting, per-call timeouts and jittered exponential retry
+# in front of a pluggable backend (OpenAI, or the offline fake in fake_llm.py). The model
+# and max_tokens for each task come from `router`; a rate-limited model fails over to the
+# next one in its route. Every call is timed and its token usage recorded in `metrics`.
+class LLMClient:
+    def __init__(
+        self,
+        backend,
+        requests_per_minute=500,
+        tokens_per_minute=30000,
+        max_retries=4,
+        base_delay=0.5,
+        max_delay=20.0,
+        timeouts=None,
+        metrics=None,
+        router=None,
+    ):
+        self.backend = backend
+        self.metrics = metrics or LLMMetrics()
+        self.router = router or ModelRouter()
+        self.limiter = RateLimiter(requests_per_minute, tokens_per_minute)
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.timeouts = dict(DEFAULT_TIMEOUTS, **(timeouts or {}))
+
+    # LLM_BACKEND=fake selects the offline stand-in; anything else talks to OpenAI
+    @classmethod
+    def from_env(cls, api_key=None):
+        if os.getenv("LLM_BACKEND", "openai").lower() == "fake":
+            from fake_llm import FakeBackend
+            backend = FakeBackend.from_env()
+        else:
+            backend = OpenAIBackend(
+                api_key=api_key,
+                max_connections=int(os.getenv("OPENAI_MAX_CONNECTIONS", "50")),
+                max_keepalive_connections=int(os.getenv("OPENAI_MAX_KEEPALIVE", "20")),
+            )
+        return cls(
+            backend=backend,
+            requests_per_minute=int(os.getenv("OPENAI_RPM_LIMIT", "500")),
+            tokens_per_minute=int(os.getenv("OPENAI_TPM_LIMIT", "30000")),
+            max_retries=int(os.getenv("OPENAI_MAX_RETRIES", "4")),
+            metrics=LLMMetrics.from_env(),
+            router=ModelRouter.from_env(),
+        )
+
+    # Full-jitter backoff, honouring the server's Retry-After hint when it sends one
+    def _backoff(self, attempt, error):
+        delay = random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+        response = getattr(error, "response", None)
+        if response is not None:
+            retry_after = response.headers.get("retry-after")
+            try:
+                delay = max(delay, min(self.max_delay, float(retry_after)))
+            except (TypeError, ValueError):
+                pass
+        time.sleep(delay)
+
+    def _retryable_errors(self):
+        return RETRYABLE_ERRORS + tuple(getattr(self.backend, "retryable_errors", ()))
+
+    def _rate_limit_errors(self):
+        return RATE_LIMIT_ERRORS + tuple(getattr(self.backend, "rate_limit_errors", ()))
+
+    # An explicit model= from the caller pins the call to that model; otherwise the task's route decides
+    def _models(self, task, kwargs):
+        return (kwargs["model"],) if kwargs.get("model") else self.router.route(task).models
+
+    def _call(self, method, task, messages, kwargs):
+        models = self._models(task, kwargs)
+        kwargs = {key: value for key, value in kwargs.items() if key != "model"}
+        max_tokens = self.router.route(task).max_tokens
+        if max_tokens and "max_tokens" not in kwargs:
+            kwargs["max_tokens"] = max_tokens
+        kwargs.setdefault("timeout", self.timeouts.get(task, 30.0))
+        estimated = estimate_tokens(messages, kwargs.get("max_tokens"))
+        index = 0
+        for attempt in range(self.max_retries + 1):
+            self.limiter.acquire(estimated)
+            try:
+                return method(task, messages, model=models[index], **kwargs)
+            except Exception as e:
+                # Read per attempt: a lazily loaded SDK only registers its errors on first use
+                if attempt == self.max_retries or not isinstance(e, self._retryable_errors()):
+                    raise
+                # Out of quota on this model: move down the chain at once instead of waiting
+                if isinstance(e, self._rate_limit_errors()) and index + 1 < len(models):
+                    index += 1
+                    continue
+                index = 0
+                self._backoff(attempt, e)
+
+    # Blocking chat completion; raises the last error once retries are exhausted
+    def complete(self, task, messages, **kwargs):
+        started = time.perf_counter()
+        try:
+            completion = self._call(self.backend.complete, task, messages, kwargs)
+        except Exception as e:
+            self.metrics.record_call(task, self._models(task, kwargs)[0], time.perf_counter() - started, error=e)
+            raise
+        self.metrics.record_call(
+            task,
+            completion.model,
+            time.perf_counter() - started,
+            prompt_tokens=completion.prompt_tokens,
+            completion_tokens=completion.completion_tokens,
+        )
+        return completion
+
+    # Streaming chat completion yielding text deltas; retries only happen before the stream opens
+    def stream(self, task, messages, **kwargs):
+        started = time.perf_counter()
+        stream, ttft, chars, error = None, None, 0, None
+        try:
+            stream = self._call(self.backend.open_stream, task, messages, kwargs)
+            for delta in stream:
+                if ttft is None:
+                    ttft = time.perf_counter() - started
+                chars += len(delta)
+                yield delta
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            prompt_tokens = completion_tokens = 0
+            if stream is not None:
+                # Streams cut short (or backends that don't report usage) fall back to a character estimate
+                prompt_tokens = stream.prompt_tokens or sum(len(m.get("content") or "") for m in messages) // 4
+                completion_tokens = stream.completion_tokens or chars // 4
+            self.metrics.record_call(
+                task,
+                getattr(stream, "model", None) or self._models(task, kwargs)[0],
+                time.perf_counter() - started,
+                ttft=ttft,
+                prompt_tokens=prompt_tokens,
+                completion_tokens=completion_tokens,
+                error=error,
+            )
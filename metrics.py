@@ -0,0 +1,220 @@
+import json
+import os
+import statistics
+import threading
+import time
+from collections import deque
+
+# USD per 1K (prompt, completion) tokens; matched on the longest model-name prefix so dated
+# snapshots such as "gpt-4o-2024-08-06" price like their family
+MODEL_PRICES = {
+    "gpt-4": (0.03, 0.06),
+    "gpt-4-turbo": (0.01, 0.03),
+    "gpt-4o": (0.0025, 0.01),
+    "gpt-4o-mini": (0.00015, 0.0006),
+    "gpt-4.1": (0.002, 0.008),
+    "gpt-4.1-mini": (0.0004, 0.0016),
+    "gpt-3.5-turbo": (0.0005, 0.0015),
+}
+
+# Prometheus histogram buckets (seconds) for call duration and time to first token
+LATENCY_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.0, 5.0, 10.0, 20.0, 60.0)
+
+
+def estimate_cost(model, prompt_tokens, completion_tokens):
+    family = max((name for name in MODEL_PRICES if (model or "").startswith(name)), key=len, default=None)
+    if family is None:
+        return 0.0
+    prompt_price, completion_price = MODEL_PRICES[family]
+    return (prompt_tokens * prompt_price + completion_tokens * completion_price) / 1000
+
+
+class Histogram:
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.total += value
+        self.count += 1
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+
+
+# Running totals for one kind of call (vendor_reply, strategy, summary, insights, ...)
+class TaskStats:
+    def __init__(self, window):
+        self.calls = 0
+        self.errors = 0
+        self.cache_hits = 0
+        self.fallbacks = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.cost = 0.0
+        self.duration = Histogram()
+        self.ttft = Histogram()
+        # Recent samples for percentiles in the admin panel
+        self.recent_durations = deque(maxlen=window)
+        self.recent_ttfts = deque(maxlen=window)
+
+
+def _percentile(values, pct):
+    if not values:
+        return None
+    if len(values) == 1:
+        return values[0]
+    return statistics.quantiles(values, n=100, method="inclusive")[pct - 1]
+
+
+def _labels(**labels):
+    return "{" + ",".join(f'{key}="{value}"' for key, value in labels.items()) + "}"
+
+
+# Process-wide LLM call instrumentation: wall time, time to first token, token usage,
+# estimated cost, cache hits and fallbacks per task. Exposed as Prometheus text, an
+# optional JSONL trace (one event per line) and a summary table for the admin panel.
+class LLMMetrics:
+    def __init__(self, trace_path=None, textfile_path=None, window=500):
+        self.trace_path = trace_path
+        self.textfile_path = textfile_path
+        self.window = window
+        self.started_at = time.time()
+        self._tasks = {}
+        # Re-entrant: writing the textfile renders the metrics while a record call holds the lock
+        self._lock = threading.RLock()
+        if trace_path and os.path.dirname(trace_path):
+            os.makedirs(os.path.dirname(trace_path), exist_ok=True)
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            trace_path=os.getenv("LLM_TRACE_PATH") or None,
+            textfile_path=os.getenv("LLM_METRICS_TEXTFILE") or None,
+            window=int(os.getenv("LLM_METRICS_WINDOW", "500")),
+        )
+
+    def _stats(self, task):
+        stats = self._tasks.get(task)
+        if stats is None:
+            stats = self._tasks[task] = TaskStats(self.window)
+        return stats
+
+    def _emit(self, event):
+        if self.trace_path:
+            event = dict(event, ts=round(time.time(), 3))
+            with open(self.trace_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(event) + "\n")
+        if self.textfile_path:
+            # Atomic replace so a node_exporter textfile collector never reads a partial file
+            tmp_path = f"{self.textfile_path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.write(self.prometheus_text())
+            os.replace(tmp_path, self.textfile_path)
+
+    # One finished (or failed) API call; `ttft` is None for blocking calls
+    def record_call(self, task, model, duration, ttft=None, prompt_tokens=0, completion_tokens=0, error=None):
+        cost = estimate_cost(model, prompt_tokens, completion_tokens)
+        with self._lock:
+            stats = self._stats(task)
+            stats.calls += 1
+            stats.duration.observe(duration)
+            stats.recent_durations.append(duration)
+            if ttft is not None:
+                stats.ttft.observe(ttft)
+                stats.recent_ttfts.append(ttft)
+            if error is not None:
+                stats.errors += 1
+            stats.prompt_tokens += prompt_tokens
+            stats.completion_tokens += completion_tokens
+            stats.cost += cost
+            self._emit({
+                "event": "call",
+                "task": task,
+                "model": model,
+                "duration_ms": round(duration * 1000, 1),
+                "ttft_ms": round(ttft * 1000, 1) if ttft is not None else None,
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "cost_usd": round(cost, 6),
+                "error": type(error).__name__ if error is not None else None,
+            })
+
+    # A result served from the completion cache instead of the API
+    def record_cache_hit(self, task):
+        with self._lock:
+            self._stats(task).cache_hits += 1
+            self._emit({"event": "cache_hit", "task": task})
+
+    # The user was shown canned fallback text because the call failed
+    def record_fallback(self, task, error=None):
+        with self._lock:
+            self._stats(task).fallbacks += 1
+            self._emit({"event": "fallback", "task": task, "error": type(error).__name__ if error else None})
+
+    # Per-task summary rows, costliest first
+    def summary(self):
+        with self._lock:
+            rows = []
+            for task, stats in self._tasks.items():
+                durations, ttfts = sorted(stats.recent_durations), sorted(stats.recent_ttfts)
+                p50, p95 = _percentile(durations, 50), _percentile(durations, 95)
+                ttft_p50 = _percentile(ttfts, 50)
+                rows.append({
+                    "task": task,
+                    "calls": stats.calls,
+                    "errors": stats.errors,
+                    "fallbacks": stats.fallbacks,
+                    "cache hits": stats.cache_hits,
+                    "p50 s": round(p50, 2) if p50 is not None else None,
+                    "p95 s": round(p95, 2) if p95 is not None else None,
+                    "p50 TTFT s": round(ttft_p50, 2) if ttft_p50 is not None else None,
+                    "total s": round(stats.duration.total, 1),
+                    "prompt tokens": stats.prompt_tokens,
+                    "completion tokens": stats.completion_tokens,
+                    "cost $": round(stats.cost, 4),
+                })
+        return sorted(rows, key=lambda row: (row["cost $"], row["total s"]), reverse=True)
+
+    # Prometheus text exposition format
+    def prometheus_text(self):
+        lines = []
+
+        def metric(name, kind, help_text):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+
+        def histogram(name, attr):
+            for task, stats in self._tasks.items():
+                hist = getattr(stats, attr)
+                for bound, count in zip(hist.buckets, hist.counts):
+                    lines.append(f"{name}_bucket{_labels(task=task, le=bound)} {count}")
+                lines.append(f"{name}_bucket{_labels(task=task, le='+Inf')} {hist.count}")
+                lines.append(f"{name}_sum{_labels(task=task)} {hist.total:.6f}")
+                lines.append(f"{name}_count{_labels(task=task)} {hist.count}")
+
+        with self._lock:
+            counters = (
+                ("llm_calls_total", "LLM API calls", lambda s: s.calls),
+                ("llm_call_errors_total", "LLM API calls that raised", lambda s: s.errors),
+                ("llm_cache_hits_total", "Results served from the completion cache", lambda s: s.cache_hits),
+                ("llm_fallbacks_total", "Canned fallback responses shown to the user", lambda s: s.fallbacks),
+                ("llm_cost_usd_total", "Estimated spend in USD", lambda s: round(s.cost, 6)),
+            )
+            for name, help_text, value in counters:
+                metric(name, "counter", help_text)
+                for task, stats in self._tasks.items():
+                    lines.append(f"{name}{_labels(task=task)} {value(stats)}")
+
+            metric("llm_tokens_total", "counter", "Tokens reported by the API")
+            for task, stats in self._tasks.items():
+                lines.append(f"llm_tokens_total{_labels(task=task, kind='prompt')} {stats.prompt_tokens}")
+                lines.append(f"llm_tokens_total{_labels(task=task, kind='completion')} {stats.completion_tokens}")
+
+            metric("llm_call_duration_seconds", "histogram", "Wall time per LLM call including retries")
+            histogram("llm_call_duration_seconds", "duration")
+            metric("llm_time_to_first_token_seconds", "histogram", "Time to the first streamed token")
+            histogram("llm_time_to_first_token_seconds", "ttft")
+        return "\n".join(lines) + "\n"
@@ -0,0 +1,554 @@
+import json
+import zlib
+
+from cache import completion_cache_key
+from chat import ChatLog, Role
+from context import ConversationContext
+from insights import parse_insights_report
+from pricing import extract_buyer_offer, extract_price_from_message, format_price
+from structured import (
+    STRATEGY_SCHEMA, VENDOR_REPLY_SCHEMA, JsonFieldStream, StrategySuggestion, VendorReply, response_format
+)
+from trajectory import BUYER, VENDOR, OfferTrajectory
+from vendor_engine import VendorEngine
+
+# System prompt at the head of every negotiation transcript
+SYSTEM_PROMPT = (
+    "You are an AI negotiation strategist. The chat involves a buyer and a vendor. "
+    "Your job is to analyze the conversation and occasionally provide strategic suggestions "
+    "to the buyer to improve negotiation outcomes."
+)
+
+# Vendor line used when the LLM can't produce a reply and there's no price to work from
+VENDOR_FALLBACK_REPLY = "Thanks for that. Let me see what I can do for you."
+
+# Local negotiator standing in for failed vendor-reply calls when callers don't pass one
+DEFAULT_VENDOR_ENGINE = VendorEngine()
+
+
+# Opening lines rendered locally so the first vendor message needs no LLM round trip
+OPENING_TEMPLATES = (
+    "Hi! Thanks for your interest in our {product}. We're offering it at {price} - it's a great value for the quality we provide.",
+    "Thanks for reaching out about the {product}. Our current price is {price}, and I'm happy to walk you through what's included.",
+    "Hello from {vendor}! The {product} is available at {price} - it's one of our most popular options.",
+    "Great to hear from you. We can supply the {product} at {price}. Let me know what quantities you have in mind.",
+)
+
+# Function to render the vendor's opening quote from a template; the same vendor/product always gets the same line
+def render_opening_quote(vendor, product, quoted_price):
+    template = OPENING_TEMPLATES[zlib.crc32(f"{vendor}|{product}".encode("utf-8")) % len(OPENING_TEMPLATES)]
+    return template.format(vendor=vendor, product=product, price=format_price(quoted_price))
+
+# Function to build the prompt for the vendor's initial quote
+def build_vendor_quote_prompt(vendor, product, quoted_price):
+    return f"""
+    You are a sales representative working for {vendor}. A potential buyer wants to discuss purchasing {product}.
+    
+    IMPORTANT: You are speaking AS the {vendor} sales rep, not giving suggestions about what to say.
+    
+    Respond naturally as a salesperson would in a real conversation. Keep it brief (1-2 sentences).
+    Mention the ${quoted_price} price in a natural way.
+    
+    Example good response: "Hi! Thanks for your interest in our {product}. We're offering it at ${quoted_price} - it's a great value for the quality we provide."
+    
+    Do NOT say things like "Suggestion:" or "The vendor could say:" - just speak as the vendor directly.
+    """
+
+# Function to build the prompt for the vendor's response to the buyer
+def build_vendor_response_prompt(chat_history, vendor, product, quoted_price, buyer_message, context):
+    # Rolling summary plus recent turns, phrased from the vendor's point of view
+    def vendor_view(msg):
+        if msg.role is Role.BUYER:
+            return f"Buyer said: {msg.text}"
+        elif msg.role is Role.VENDOR:
+            return f"You (vendor) said: {msg.text}"
+        return msg.content
+
+    recent_context = context.render(chat_history.turns, formatter=vendor_view)
+    
+    return f"""
+    You are a {vendor} sales representative. You are currently negotiating the sale of {product} with an asking price of ${quoted_price}.
+    
+    Context of the conversation so far:
+    {recent_context}
+    
+    The buyer just said: "{buyer_message}"
+    
+    IMPORTANT: Respond AS the {vendor} sales rep, not as an advisor giving suggestions.
+    
+    Guidelines for your response:
+    - Keep it conversational and brief (1-2 sentences max)
+    - Act like a realistic salesperson who wants to make the sale but also protect profit margins
+    - You can negotiate, but don't give away too much too quickly
+    - Show some flexibility if the buyer makes reasonable points
+    - If you mention a price, be specific (e.g., "I can do $1150" not "I can lower it a bit")
+    - Do NOT say "Suggestion:" or "The vendor could say:" - just respond directly as the vendor
+    
+    Respond naturally as the {vendor} sales rep would in this situation.
+    Put what you say in "reply", and the price you are offering in this reply in "offer" (a number, or null if you don't state one).
+    """
+
+# Function to stream a completion as text deltas, falling back to canned text on failure
+def stream_completion(client, task, prompt, temperature, fallback, **kwargs):
+    received = False
+    try:
+        for delta in client.stream(
+            task,
+            messages=[{"role": "user", "content": prompt}],
+            temperature=temperature,
+            **kwargs
+        ):
+            received = True
+            yield delta
+    except Exception as e:
+        # Only fall back if nothing reached the user yet; otherwise keep the partial reply
+        if not received:
+            client.metrics.record_fallback(task, e)
+            yield fallback
+
+# Function to generate vendor's initial quote
+def generate_vendor_quote(client, vendor, product, quoted_price):
+    vendor_prompt = build_vendor_quote_prompt(vendor, product, quoted_price)
+    
+    try:
+        response = client.complete(
+            "vendor_quote",
+            messages=[{"role": "user", "content": vendor_prompt}],
+            temperature=0.7
+        )
+        return response.text.strip()
+    except Exception as e:
+        client.metrics.record_fallback("vendor_quote", e)
+        return render_opening_quote(vendor, product, quoted_price)
+
+# Function to stream vendor's initial quote token by token
+def stream_vendor_quote(client, vendor, product, quoted_price):
+    return stream_completion(
+        client,
+        "vendor_quote",
+        build_vendor_quote_prompt(vendor, product, quoted_price),
+        temperature=0.7,
+        fallback=render_opening_quote(vendor, product, quoted_price)
+    )
+
+# Function to build the prompt that rewrites a templated opening quote in a more natural voice
+def build_quote_polish_prompt(vendor, product, quoted_price, draft):
+    return f"""
+    Rewrite this opening line from a {vendor} sales representative to a buyer interested in {product}.
+    Make it sound natural and specific to the product, in 1-2 sentences, speaking AS the sales rep.
+    Keep the price exactly {format_price(quoted_price)}. Reply with the rewritten line only.
+
+    Line: {draft}
+    """
+
+# Function to polish a templated opening quote; returns None unless the rewrite keeps the quoted price
+def polish_vendor_quote(client, vendor, product, quoted_price, draft):
+    response = client.complete(
+        "vendor_quote",
+        messages=[{"role": "user", "content": build_quote_polish_prompt(vendor, product, quoted_price, draft)}],
+        temperature=0.7
+    )
+    polished = response.text.strip().strip('"')
+    match = extract_price_from_message(polished)
+    if not polished or match is None or abs(match.value - float(quoted_price)) > 0.005:
+        return None
+    return polished
+
+# Function to look up a cached vendor reply; returns (state key, cached VendorReply or None).
+# With `offer` (hybrid mode: the engine's price) only a reply naming exactly that price is served
+def lookup_cached_reply(client, reply_cache, vendor, product, quoted_price, current_offer, buyer_message, offer=None):
+    if reply_cache is None:
+        return None, None
+    key = reply_cache.key(vendor, product, quoted_price, current_offer, buyer_message)
+    cached = reply_cache.get(key, buyer_message, max_offer=current_offer, offer=offer)
+    if cached is not None:
+        client.metrics.record_cache_hit("vendor_reply")
+    return key, cached
+
+# Function to remember a model-written vendor reply (never a fallback)
+def remember_reply(reply_cache, key, buyer_message, reply, fallback=None):
+    if reply_cache is None or key is None or reply.reply == VENDOR_FALLBACK_REPLY:
+        return
+    if fallback is not None and reply.reply == fallback.reply:
+        return
+    reply_cache.put(key, buyer_message, reply)
+
+# Function to get the local engine's move for this turn (microseconds; no LLM call)
+def decide_vendor_move(engine, chat_history, vendor, product, quoted_price, current_offer, buyer_message):
+    buyer_offer = extract_buyer_offer(buyer_message)
+    return engine.decide(
+        vendor, product, quoted_price, current_offer,
+        buyer_offer.value if buyer_offer else None,
+        turn=max(1, len(chat_history.turns) // 2),
+    )
+
+# Function to build the hybrid-mode prompt: the engine has fixed the price, the model only words the reply
+def build_hybrid_vendor_prompt(chat_history, vendor, product, quoted_price, buyer_message, context, decision):
+    move = "close the deal at" if decision.accepted else "offer exactly"
+    return build_vendor_response_prompt(chat_history, vendor, product, quoted_price, buyer_message, context) + f"""
+    Your decision for this turn is already made: {move} {format_price(decision.offer)}. State that exact price,
+    don't offer any other, and set "offer" to {decision.offer}.
+    """
+
+# Function to generate vendor's response to buyer as a structured reply + offer. The local engine
+# (`engine`, fallback mode by default) answers on its own in practice mode, fixes the price in
+# hybrid mode, and replaces a failed call otherwise. `current_offer` is the vendor's standing
+# offer as tracked by the caller (the quoted price until the vendor moves)
+def generate_vendor_response(
+    client, chat_history, vendor, product, quoted_price, buyer_message, context, reply_cache=None, engine=None,
+    current_offer=None
+):
+    engine = engine or DEFAULT_VENDOR_ENGINE
+    current_offer = current_offer or quoted_price
+    decision = decide_vendor_move(engine, chat_history, vendor, product, quoted_price, current_offer, buyer_message)
+    fallback = VendorReply(reply=decision.reply, offer=decision.offer)
+    if engine.mode == "practice":
+        return fallback
+
+    # The engine's decision is binding in hybrid mode, cached replies included
+    required = decision.offer if engine.mode == "hybrid" else None
+    key, cached = lookup_cached_reply(
+        client, reply_cache, vendor, product, quoted_price, current_offer, buyer_message, offer=required
+    )
+    if cached is not None:
+        return cached
+    if engine.mode == "hybrid":
+        vendor_context = build_hybrid_vendor_prompt(
+            chat_history, vendor, product, quoted_price, buyer_message, context, decision
+        )
+    else:
+        vendor_context = build_vendor_response_prompt(chat_history, vendor, product, quoted_price, buyer_message, context)
+    
+    try:
+        response = client.complete(
+            "vendor_reply",
+            messages=[{"role": "user", "content": vendor_context}],
+            temperature=0.7,
+            response_format=response_format("vendor_reply", VENDOR_REPLY_SCHEMA)
+        )
+        reply = VendorReply.from_json(response.text)
+        if engine.mode == "hybrid":
+            # Keep the model's wording only if it names the engine's price
+            match = extract_price_from_message(reply.reply)
+            if match is None or abs(match.value - decision.offer) > 0.005:
+                client.metrics.record_fallback("vendor_reply")
+                return fallback
+            reply = VendorReply(reply=reply.reply, offer=decision.offer)
+        remember_reply(reply_cache, key, buyer_message, reply)
+        return reply
+    except Exception as e:
+        client.metrics.record_fallback("vendor_reply", e)
+        return fallback
+
+# Function to stream vendor's response to buyer token by token; iterating yields the reply text
+# and the full JSON (reply + offer) is left in the stream's buffer. Engine replies (practice mode),
+# validated hybrid rewrites and reply cache hits arrive in one chunk
+def stream_vendor_response(
+    client, chat_history, vendor, product, quoted_price, buyer_message, context, reply_cache=None, engine=None,
+    current_offer=None
+):
+    engine = engine or DEFAULT_VENDOR_ENGINE
+    current_offer = current_offer or quoted_price
+    if engine.mode in ("practice", "hybrid"):
+        reply = generate_vendor_response(
+            client, chat_history, vendor, product, quoted_price, buyer_message, context, reply_cache, engine,
+            current_offer
+        )
+        return JsonFieldStream(iter([json.dumps({"reply": reply.reply, "offer": reply.offer})]), "reply")
+
+    key, cached = lookup_cached_reply(client, reply_cache, vendor, product, quoted_price, current_offer, buyer_message)
+    if cached is not None:
+        return JsonFieldStream(iter([json.dumps({"reply": cached.reply, "offer": cached.offer})]), "reply")
+    decision = decide_vendor_move(engine, chat_history, vendor, product, quoted_price, current_offer, buyer_message)
+    fallback = VendorReply(reply=decision.reply, offer=decision.offer)
+    deltas = stream_completion(
+        client,
+        "vendor_reply",
+        build_vendor_response_prompt(chat_history, vendor, product, quoted_price, buyer_message, context),
+        temperature=0.7,
+        fallback=json.dumps({"reply": fallback.reply, "offer": fallback.offer}),
+        response_format=response_format("vendor_reply", VENDOR_REPLY_SCHEMA)
+    )
+    if reply_cache is not None:
+        deltas = _remember_streamed_reply(deltas, reply_cache, key, buyer_message, fallback)
+    return JsonFieldStream(deltas, "reply")
+
+# Function to pass streamed deltas through, caching the reply once the stream completes intact
+def _remember_streamed_reply(deltas, reply_cache, key, buyer_message, fallback):
+    text = ""
+    for delta in deltas:
+        text += delta
+        yield delta
+    try:
+        remember_reply(reply_cache, key, buyer_message, VendorReply.from_json(text), fallback)
+    except ValueError:
+        pass
+
+# Function to pick the vendor's current offer: the structured field, else parse it from the text
+def detect_vendor_offer(reply):
+    if reply.offer is not None:
+        return reply.offer
+    match = extract_price_from_message(reply.reply)
+    return match.value if match else None
+
+# Function to build the strategy suggestion prompt
+def build_strategy_prompt(chat_history, vendor, product, quoted_price, context, target_price=None):
+    target = f"The buyer's target price is ${target_price}; never suggest offering more than that." if target_price else ""
+    return f"""
+                    You are assisting a buyer in negotiation with {vendor} for {product} at ${quoted_price}.
+                    {target}
+
+                    Analyze the recent conversation and provide:
+                    1. A strategic insight on how the buyer should respond
+                    2. A suggested buyer message that is natural and persuasive
+
+                    Recent conversation context:
+                    {context.render(chat_history.turns)}
+
+                    Put your strategic advice in "strategy" and the suggested buyer message in "message".
+                    """
+
+# Function to stream a strategy suggestion as structured JSON; iterating yields the strategy text
+def stream_strategy_suggestion(client, strategy_prompt):
+    deltas = client.stream(
+        "strategy",
+        messages=[{"role": "user", "content": strategy_prompt}],
+        temperature=0.6,
+        response_format=response_format("strategy_suggestion", STRATEGY_SCHEMA)
+    )
+    return JsonFieldStream(deltas, "strategy")
+
+# Price movement computed from the offer trajectory, so the model reports the numbers instead of deriving them
+def price_movement_section(trajectory):
+    if trajectory is None:
+        return ""
+    return f"""
+                Price movement so far (precomputed - use these figures as given in the Price Movement section, do not recalculate them):
+                {trajectory.describe()}
+                """
+
+# Function to build the negotiation summary prompt
+def build_summary_prompt(chat_history, vendor, product, quoted_price, context, trajectory=None):
+    # Summaries get a larger window than the per-turn prompts
+    chat_content = context.render(chat_history.turns, token_budget=context.token_budget * 2)
+    return f"""
+                Based on this negotiation between buyer and vendor for {product} from {vendor} (initially quoted at ${quoted_price}), create a structured summary:
+
+                - **Key Discussion Points**
+                - **Negotiation Progress** 
+                - **Current Status**
+                - **Price Movement** (if any)
+                - **Next Steps/Action Items**
+                - **Strategic Insights**
+
+                Conversation:
+                {chat_content}
+                {price_movement_section(trajectory)}"""
+
+# Function to build the prompt that extends an existing summary with new turns only
+def build_summary_update_prompt(previous_summary, new_turns, vendor, product, quoted_price, trajectory=None):
+    new_content = "\n".join([msg.content for msg in new_turns])
+    return f"""
+                Below is a structured summary of a negotiation between buyer and vendor for {product} from {vendor} (initially quoted at ${quoted_price}), followed by the turns that happened since it was written.
+                Rewrite the summary so it also covers the new turns, keeping the same sections:
+
+                - **Key Discussion Points**
+                - **Negotiation Progress** 
+                - **Current Status**
+                - **Price Movement** (if any)
+                - **Next Steps/Action Items**
+                - **Strategic Insights**
+
+                Previous summary:
+                {previous_summary}
+
+                New turns:
+                {new_content}
+                {price_movement_section(trajectory)}"""
+
+# Function to bring the negotiation summary up to date, sending only turns it doesn't cover yet
+def refresh_negotiation_summary(client, previous, chat_history, vendor, product, quoted_price, context, trajectory=None):
+    covered = len(chat_history)
+    if previous is not None and previous["covered"] == covered:
+        # Nothing new since the last summary: no API call
+        return previous
+
+    if previous is None:
+        summary_prompt = build_summary_prompt(chat_history, vendor, product, quoted_price, context, trajectory)
+    else:
+        summary_prompt = build_summary_update_prompt(
+            previous["text"], chat_history[previous["covered"]:], vendor, product, quoted_price, trajectory
+        )
+
+    response = client.complete(
+        "summary",
+        messages=[{"role": "user", "content": summary_prompt}],
+        temperature=0.5
+    )
+    return {"text": response.text, "covered": covered}
+
+# Function to fold older negotiation turns into the rolling context summary
+def summarize_turns(client, prior_summary, turns_text):
+    prompt = f"""
+    Update the running summary of a buyer/vendor negotiation with the new turns below.
+    Keep every price, concession, commitment and open question. Reply with the summary only, in at most 120 words.
+
+    Current summary:
+    {prior_summary or "(none yet)"}
+
+    New turns:
+    {turns_text}
+    """
+    response = client.complete(
+        "context_summary",
+        messages=[{"role": "user", "content": prompt}],
+        temperature=0.3
+    )
+    return response.text.strip()
+
+# Function to fold old turns into the summary without failing the caller
+def update_conversation_context(client, context, chat_history):
+    try:
+        context.update(chat_history.turns, lambda summary, turns: summarize_turns(client, summary, turns))
+    except Exception as e:
+        # Unsummarized turns stay eligible for the verbatim window; retry after the next reply
+        client.metrics.record_fallback("context_summary", e)
+
+# Function to build the market insights report prompt
+def build_insights_prompt(vendor, product, quoted_price):
+    return f"""
+            You are an expert procurement advisor. Prepare a structured negotiation insights report for a buyer:
+
+            ### Market Intelligence Brief:
+            (Provide insights on {product} market trends, {vendor}'s position, and negotiation leverage points)
+
+            ### Current Market Rates:
+            Brand | Model | Price Range | Notes
+            --- | --- | --- | ---
+            (Include 3-4 comparable {product} options with realistic pricing)
+
+            ### Competitor Comparison:
+            Vendor | Unit Price | Key Advantage | Delivery
+            --- | --- | --- | ---
+            (Compare {vendor} with 2-3 competitors for {product})
+
+            ### Negotiation Tips:
+            (Provide 3-4 specific tactics for negotiating {product} with {vendor})
+
+            Context: {vendor} | {product} | ${quoted_price}
+            """
+
+# Function to generate the market insights report text, served from the shared cache when possible
+def generate_market_insights(client, cache, vendor, product, quoted_price):
+    prompt = build_insights_prompt(vendor, product, quoted_price)
+    # Keyed on the routed model so switching the insights model doesn't serve stale reports
+    model, temperature = client.router.route("insights").model, 0.4
+    key = completion_cache_key(prompt, model, temperature)
+
+    cached = cache.get(key)
+    if cached is not None:
+        client.metrics.record_cache_hit("insights")
+        return cached
+
+    response = client.complete(
+        "insights",
+        messages=[{"role": "user", "content": prompt}],
+        temperature=temperature
+    )
+    insights = response.text
+    cache.set(key, insights)
+    return insights
+
+# Function to generate the insights report and parse it once into sections and tables
+def generate_insights_report(client, cache, vendor, product, quoted_price):
+    return parse_insights_report(generate_market_insights(client, cache, vendor, product, quoted_price))
+
+
+# One buyer/vendor negotiation driven directly, without Streamlit: the same prompts, context
+# window, offer tracking and summary logic the app uses. Used by headless drivers such as
+# the load-test harness.
+class NegotiationSession:
+    def __init__(
+        self, client, vendor, product, quoted_price, context=None, target_price=None, reply_cache=None, engine=None
+    ):
+        self.client = client
+        self.reply_cache = reply_cache
+        self.engine = engine
+        self.vendor = vendor
+        self.product = product
+        self.quoted_price = quoted_price
+        self.target_price = target_price
+        self.context = context or ConversationContext.from_env()
+        self.history = ChatLog(SYSTEM_PROMPT)
+        self.current_offer = None
+        self.trajectory = OfferTrajectory(quoted_price)
+        self.summary = None
+
+    def _add_vendor_message(self, text):
+        self.history.append(Role.VENDOR, text, self.vendor)
+
+    # Opening quote; `on_delta` receives streamed text as it arrives. With `template` the
+    # line is rendered locally without an LLM call
+    def open(self, stream=True, on_delta=None, template=False):
+        if template:
+            text = "".join(_forward([render_opening_quote(self.vendor, self.product, self.quoted_price)], on_delta))
+        elif stream:
+            text = "".join(_forward(stream_vendor_quote(self.client, self.vendor, self.product, self.quoted_price), on_delta))
+        else:
+            text = generate_vendor_quote(self.client, self.vendor, self.product, self.quoted_price)
+        text = text.strip()
+        self._add_vendor_message(text)
+        self.current_offer = self.quoted_price
+        self.trajectory.append(len(self.history) - 1, VENDOR, self.quoted_price)
+        return text
+
+    # Send a buyer message and return the vendor's VendorReply
+    def reply(self, buyer_message, stream=True, on_delta=None):
+        self.history.append(Role.BUYER, buyer_message)
+        proposed = extract_buyer_offer(buyer_message)
+        if proposed:
+            self.trajectory.append(len(self.history) - 1, BUYER, proposed.value)
+        args = (
+            self.client, self.history, self.vendor, self.product, self.quoted_price, buyer_message, self.context,
+            self.reply_cache, self.engine, self.current_offer
+        )
+        if stream:
+            reply_stream = stream_vendor_response(*args)
+            text = "".join(_forward(reply_stream, on_delta)).strip()
+            try:
+                reply = VendorReply.from_json(reply_stream.buffer)
+            except ValueError:
+                reply = VendorReply(reply=text, offer=None)
+        else:
+            reply = generate_vendor_response(*args)
+
+        self._add_vendor_message(reply.reply)
+        offer = detect_vendor_offer(reply)
+        if offer:
+            self.current_offer = offer
+            self.trajectory.append(len(self.history) - 1, VENDOR, offer)
+        update_conversation_context(self.client, self.context, self.history)
+        return reply
+
+    def suggest_strategy(self):
+        prompt = build_strategy_prompt(
+            self.history, self.vendor, self.product, self.quoted_price, self.context, self.target_price
+        )
+        suggestion_stream = stream_strategy_suggestion(self.client, prompt)
+        for _ in suggestion_stream:
+            pass
+        return StrategySuggestion.from_json(suggestion_stream.buffer)
+
+    def summarize(self):
+        self.summary = refresh_negotiation_summary(
+            self.client, self.summary, self.history, self.vendor, self.product, self.quoted_price, self.context,
+            self.trajectory
+        )
+        return self.summary["text"]
+
+
+def _forward(chunks, on_delta):
+    for chunk in chunks:
+        if on_delta is not None:
+            on_delta(chunk)
+        yield chunk
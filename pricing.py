@@ -0,0 +1,169 @@
+import re
+from dataclasses import dataclass
+
+# One precompiled pattern covering "$1,200", "1200 dollars", "USD 1.2k", "€950", "1150.00", ...
+# Matching is case-sensitive on purpose (IGNORECASE roughly halves throughput), so
+# currency words list their capitalised forms explicitly.
+PRICE_PATTERN = re.compile(
+    r"""
+    (?=[$€£\dUEG])(?<![\w.,$€£])
+    (?P<currency_pre>US\$|\$|€|£|(?:USD|EUR|GBP)\s?)?
+    (?P<amount>\d{1,3}(?:,\d{3})+|\d+)(?:\.(?P<decimals>\d{1,2}))?(?![\d,]\d)
+    (?:\s?(?P<suffix>[kK])(?![a-zA-Z]))?
+    (?:\s*(?P<currency_post>[Dd]ollars?|[Bb]ucks|USD|usd|[Ee]uros?|EUR|[Pp]ounds?|GBP)\b)?
+    (?P<unit>\s*(?:%|[Pp]ercent\b|[Uu]nits?\b|pcs\b|[Pp]ieces?\b|[Ll]icen[sc]es?\b|[Ss]eats?\b|[Uu]sers?\b
+        |[Mm]onths?\b|[Yy]ears?\b|[Dd]ays?\b|[Ww]eeks?\b|[Oo]ff\b))?
+    """,
+    re.VERBOSE,
+)
+
+# Phrases just before a price that mark it as the offer on the table...
+OFFER_CUES = frozenset({
+    "do", "offer", "at", "to", "for", "make it", "come down to", "go to", "as low as", "price is",
+    "how about", "best", "best is", "final", "only", "just", "asking", "meet you at", "settle on",
+    "approve", "accept", "now", "down to", "do is", "can do is",
+})
+# ...and phrases that mark it as a previous, list or competitor price
+STALE_CUES = frozenset({
+    "from", "down from", "instead of", "was", "was at", "were at", "originally", "list", "list price",
+    "list price is", "usual", "our usual", "usually", "regular", "regularly", "normally", "compared to",
+    "versus", "vs", "vs.", "msrp", "msrp is", "retail", "rrp", "competitors", "competitors charge",
+    "competitor", "charge", "above", "proposal of", "offer of", "below", "price of", "list price of",
+})
+# Buyer messages propose a number ("can you match", "how about") and often cite a reference
+# price to argue from ("competitor sells it for", "budget was"); those cite-cues are stale
+BUYER_OFFER_CUES = frozenset({
+    "match", "do", "you do", "can you do", "could you do", "pay", "offer", "how about", "what about",
+    "take", "you take", "accept", "at", "go to", "come down to", "meet at", "meet you at", "settle on",
+    "settle at", "budget is", "only", "just", "down to", "approve",
+})
+BUYER_STALE_CUES = frozenset({
+    "sells", "sells it for", "sells for", "sell it for", "selling", "selling it for", "selling for",
+    "competitor", "competitors", "competitor's", "charges", "charge", "charging", "quoted", "quote of",
+    "quoted us", "quoted me", "paid", "we paid", "last time", "was", "were", "was at", "from", "down from",
+    "instead of", "list", "list price", "list price of", "price of", "retail", "msrp", "rrp", "elsewhere",
+    "online", "usually", "normally", "asking", "your", "above", "versus", "vs", "vs.", "compared to",
+})
+CUE_STRIP = " \t\n:;,-()"
+
+CURRENCY_CODES = {
+    "$": "USD", "us$": "USD", "usd": "USD", "dollar": "USD", "dollars": "USD", "bucks": "USD",
+    "€": "EUR", "eur": "EUR", "euro": "EUR", "euros": "EUR",
+    "£": "GBP", "gbp": "GBP", "pound": "GBP", "pounds": "GBP",
+}
+
+MIN_PRICE = 1
+MAX_PRICE = 1_000_000
+CUE_WINDOW = 30
+
+
+@dataclass(frozen=True, slots=True)
+class PriceMatch:
+    value: float
+    currency: str
+    start: int
+    end: int
+    text: str
+    confidence: float
+
+
+# Score the (up to three) words right before a price, longest phrase first
+def _cue_score(before, offer_cues=OFFER_CUES, stale_cues=STALE_CUES):
+    words = [w.strip(CUE_STRIP) for w in before.lower().split()[-3:]]
+    for size in (3, 2, 1):
+        if len(words) < size:
+            continue
+        phrase = " ".join(words[-size:])
+        if phrase in stale_cues:
+            return -0.4
+        if phrase in offer_cues:
+            return 0.3
+    return 0.0
+
+
+# Score one regex match; returns (confidence, value, currency) or None if it isn't a price
+def _score(match, message, offer_cues=OFFER_CUES, stale_cues=STALE_CUES):
+    pre, amount, decimals, suffix, post, unit = match.groups()
+    if unit:
+        return None
+    if "," in amount:
+        amount = amount.replace(",", "")
+    # Bare numbers only count when they look like a price (3+ digits or a k suffix)
+    if not (pre or post or suffix) and len(amount) < 3:
+        return None
+
+    value = float(f"{amount}.{decimals}" if decimals else amount)
+    if suffix:
+        value *= 1000
+    # The floor only applies to bare numbers: "$0.80" is a price, a stray "0" is not
+    if value > MAX_PRICE or value < (0.01 if pre or post else MIN_PRICE):
+        return None
+
+    if pre or post:
+        currency = CURRENCY_CODES.get((pre or post).strip().lower(), "USD")
+        score = 0.6
+    elif suffix:
+        currency = "USD"
+        score = 0.45
+    else:
+        currency = "USD"
+        score = 0.3
+        # Bare four-digit numbers between 1900 and 2100 are usually years
+        if 1900 <= value <= 2100 and not decimals and len(amount) == 4 and "," not in match.group("amount"):
+            score -= 0.2
+
+    start = match.start()
+    score += _cue_score(message[max(0, start - CUE_WINDOW):start], offer_cues, stale_cues)
+    return round(max(0.0, min(1.0, score)), 2), value, currency
+
+
+def _price_match(match, scored):
+    confidence, value, currency = scored
+    return PriceMatch(
+        value=value,
+        currency=currency,
+        start=match.start(),
+        end=match.end(),
+        text=match.group(0).strip(),
+        confidence=confidence,
+    )
+
+
+# All plausible price mentions in `message`, in order of appearance
+def extract_prices(message):
+    if not message:
+        return []
+    prices = []
+    for match in PRICE_PATTERN.finditer(message):
+        scored = _score(match, message)
+        if scored is not None:
+            prices.append(_price_match(match, scored))
+    return prices
+
+
+def _best_price(message, offer_cues, stale_cues):
+    if not message:
+        return None
+    best_match, best = None, None
+    for match in PRICE_PATTERN.finditer(message):
+        scored = _score(match, message, offer_cues, stale_cues)
+        if scored is not None and (best is None or scored[0] > best[0] or (scored[0] == best[0] and scored[1] < best[1])):
+            best_match, best = match, scored
+    return _price_match(best_match, best) if best is not None else None
+
+
+# The most likely current offer in a vendor message: the best-cued mention, lowest on ties
+def extract_price_from_message(message):
+    return _best_price(message, OFFER_CUES, STALE_CUES)
+
+
+# The price a buyer message proposes, with buyer-side cues: "match $1,300" beats
+# "competitor sells it for $1,600"
+def extract_buyer_offer(message):
+    return _best_price(message, BUYER_OFFER_CUES, BUYER_STALE_CUES)
+
+
+# "$1,500" for whole amounts, "$1,499.99" otherwise
+def format_price(value, symbol="$"):
+    value = float(value)
+    return f"{symbol}{value:,.0f}" if value.is_integer() else f"{symbol}{value:,.2f}"
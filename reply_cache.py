@@ -0,0 +1,161 @@
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+
+from pricing import PRICE_PATTERN, extract_buyer_offer
+from structured import VendorReply
+
+NON_WORD = re.compile(r"[^a-z<>' ]+")
+SPACES = re.compile(r"\s+")
+
+
+# Buyer message reduced to its intent: lowercase words, every amount replaced by "<price>"
+def normalize_intent(message):
+    text = PRICE_PATTERN.sub(" <price> ", message or "").lower()
+    return SPACES.sub(" ", NON_WORD.sub(" ", text)).strip()
+
+
+# Character trigrams of the normalized text; robust to typos and small rewordings
+def ngrams(text, n=3):
+    padded = f" {text} "
+    return frozenset(padded[i:i + n] for i in range(max(1, len(padded) - n + 1)))
+
+
+def similarity(a, b):
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+class _Entry:
+    __slots__ = ("grams", "variants", "served", "created_at")
+
+    def __init__(self, grams, now):
+        self.grams = grams
+        self.variants = []
+        self.served = 0
+        self.created_at = now
+
+
+# Process-wide cache of vendor replies for near-identical buyer messages in the same negotiation
+# state. The state key is (vendor, product, quoted price, current offer and buyer's proposed
+# price as percentage buckets); within a key, buyer messages match by trigram similarity
+# above `threshold`. Each matched intent collects `variants` distinct replies from the model
+# before any is served, then rotates through them, so repeat buyers don't see one canned
+# line. Keys are evicted least recently used beyond `max_keys`; entries expire after `ttl_seconds`.
+# Cached replies carry exact prices while the key only buckets them, so lookups pass the exact
+# current offer and variants that would raise it are never served.
+class VendorReplyCache:
+    def __init__(self, threshold=0.6, ttl_seconds=3600, max_keys=5000, variants=3, entries_per_key=16, bucket_pct=2.0):
+        self.threshold = threshold
+        self.ttl_seconds = ttl_seconds
+        self.max_keys = max_keys
+        self.variants = max(1, variants)
+        self.entries_per_key = entries_per_key
+        self.bucket_pct = bucket_pct
+        self.hits = 0
+        self.misses = 0
+        self._keys = OrderedDict()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            threshold=float(os.getenv("VENDOR_REPLY_CACHE_THRESHOLD", "0.6")),
+            ttl_seconds=float(os.getenv("VENDOR_REPLY_CACHE_TTL_SECONDS", "3600")),
+            max_keys=int(os.getenv("VENDOR_REPLY_CACHE_MAX_KEYS", "5000")),
+            variants=int(os.getenv("VENDOR_REPLY_CACHE_VARIANTS", "3")),
+        )
+
+    def _bucket(self, value, reference):
+        return round(value / reference * 100 / self.bucket_pct) if reference else None
+
+    # Negotiation state a reply depends on; None when the state can't be bucketed
+    def key(self, vendor, product, quoted_price, current_offer, buyer_message):
+        quoted_price = float(quoted_price or 0)
+        current_offer = float(current_offer or quoted_price)
+        if quoted_price <= 0:
+            return None
+        proposed = extract_buyer_offer(buyer_message)
+        return (
+            vendor,
+            product,
+            round(quoted_price, 2),
+            self._bucket(current_offer, quoted_price),
+            self._bucket(proposed.value, current_offer) if proposed else None,
+        )
+
+    def _match(self, entries, grams, now):
+        best, best_score = None, self.threshold
+        for entry in entries:
+            if now - entry.created_at > self.ttl_seconds:
+                continue
+            score = similarity(grams, entry.grams)
+            if score >= best_score:
+                best, best_score = entry, score
+        return best
+
+    # A cached VendorReply for this state and message, or None (counted as a miss). With
+    # `max_offer`, only variants offering at most that price (or naming none) qualify; with
+    # `offer`, only variants offering exactly that price
+    def get(self, key, buyer_message, max_offer=None, offer=None):
+        if key is None:
+            return None
+        now = time.time()
+        grams = ngrams(normalize_intent(buyer_message))
+        with self._lock:
+            entries = self._keys.get(key)
+            entry = self._match(entries, grams, now) if entries else None
+            if entry is None or len(entry.variants) < self.variants:
+                self.misses += 1
+                return None
+            usable = [
+                (reply, price) for reply, price in entry.variants
+                if (max_offer is None or price is None or price <= max_offer + 0.005)
+                and (offer is None or (price is not None and abs(price - offer) < 0.005))
+            ]
+            if not usable:
+                self.misses += 1
+                return None
+            self._keys.move_to_end(key)
+            reply, price = usable[entry.served % len(usable)]
+            entry.served += 1
+            self.hits += 1
+            return VendorReply(reply=reply, offer=price)
+
+    def put(self, key, buyer_message, reply):
+        if key is None:
+            return
+        # An acceptance of the buyer's exact number doesn't carry over to other numbers
+        proposed = extract_buyer_offer(buyer_message)
+        if proposed and reply.offer is not None and abs(reply.offer - proposed.value) < 0.005:
+            return
+        now = time.time()
+        grams = ngrams(normalize_intent(buyer_message))
+        with self._lock:
+            entries = self._keys.get(key)
+            if entries is None:
+                entries = self._keys[key] = []
+            else:
+                entries[:] = [e for e in entries if now - e.created_at <= self.ttl_seconds]
+            self._keys.move_to_end(key)
+            entry = self._match(entries, grams, now)
+            if entry is None:
+                entry = _Entry(grams, now)
+                entries.append(entry)
+                del entries[:-self.entries_per_key]
+            if len(entry.variants) < self.variants and all(text != reply.reply for text, _ in entry.variants):
+                entry.variants.append((reply.reply, reply.offer))
+            while len(self._keys) > self.max_keys:
+                self._keys.popitem(last=False)
+
+    @property
+    def hit_rate(self):
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def __len__(self):
+        with self._lock:
+            return sum(len(entries) for entries in self._keys.values())
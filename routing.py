@@ -0,0 +1,92 @@
+import os
+from dataclasses import dataclass
+
+try:
+    import tomllib
+except ImportError:  # Python < 3.11: TOML routing files need the tomli backport
+    try:
+        import tomli as tomllib
+    except ImportError:
+        tomllib = None
+
+
+@dataclass(frozen=True)
+class ModelRoute:
+    # Tried in order; the next model is used when the current one is rate-limited
+    models: tuple
+    max_tokens: int | None = None
+
+    @property
+    def model(self):
+        return self.models[0]
+
+
+# The chat loop (opening quote, vendor replies, strategy, context folding) runs on a small,
+# fast model; only the negotiation summary and the insights report use the expensive one.
+# Every model here supports JSON-schema structured outputs.
+DEFAULT_ROUTES = {
+    "vendor_quote": ModelRoute(("gpt-4o-mini", "gpt-4o"), max_tokens=120),
+    "vendor_reply": ModelRoute(("gpt-4o-mini", "gpt-4o"), max_tokens=200),
+    "strategy": ModelRoute(("gpt-4o-mini", "gpt-4o"), max_tokens=400),
+    "context_summary": ModelRoute(("gpt-4o-mini", "gpt-4o"), max_tokens=250),
+    "summary": ModelRoute(("gpt-4o", "gpt-4o-mini"), max_tokens=700),
+    "insights": ModelRoute(("gpt-4o", "gpt-4o-mini"), max_tokens=1500),
+}
+DEFAULT_ROUTE = ModelRoute(("gpt-4o-mini",))
+
+
+def _models(value):
+    if isinstance(value, str):
+        value = value.split(",")
+    models = tuple(m.strip() for m in value if m.strip())
+    if not models:
+        raise ValueError("A model route needs at least one model")
+    return models
+
+
+def _max_tokens(value):
+    if value in (None, "", 0, "0", "none"):
+        return None
+    return int(value)
+
+
+def load_routes_file(path):
+    if tomllib is None:
+        raise RuntimeError("Reading LLM_ROUTES_FILE needs Python 3.11+ or the tomli package")
+    with open(path, "rb") as f:
+        data = tomllib.load(f)
+    routes = {}
+    for task, table in data.items():
+        routes[task] = ModelRoute(
+            models=_models(table.get("models") or table.get("model") or ()),
+            max_tokens=_max_tokens(table.get("max_tokens")),
+        )
+    return routes
+
+
+# Per-task model and max_tokens table. Defaults above, then an optional TOML file
+# (LLM_ROUTES_FILE, one [task] table with `models` and `max_tokens`), then per-task
+# env overrides: LLM_MODEL_<TASK>="gpt-4o-mini,gpt-4o" and LLM_MAX_TOKENS_<TASK>=200.
+class ModelRouter:
+    def __init__(self, routes=None, default=DEFAULT_ROUTE):
+        self.routes = dict(DEFAULT_ROUTES if routes is None else routes)
+        self.default = default
+
+    @classmethod
+    def from_env(cls):
+        routes = dict(DEFAULT_ROUTES)
+        path = os.getenv("LLM_ROUTES_FILE")
+        if path:
+            routes.update(load_routes_file(path))
+        for task, route in list(routes.items()):
+            models = os.getenv(f"LLM_MODEL_{task.upper()}")
+            max_tokens = os.getenv(f"LLM_MAX_TOKENS_{task.upper()}")
+            if models is not None or max_tokens is not None:
+                routes[task] = ModelRoute(
+                    models=_models(models) if models is not None else route.models,
+                    max_tokens=_max_tokens(max_tokens) if max_tokens is not None else route.max_tokens,
+                )
+        return cls(routes)
+
+    def route(self, task):
+        return self.routes.get(task, self.default)
@@ -0,0 +1,227 @@
+import os
+import pathlib
+import queue
+import sqlite3
+import threading
+import time
+import uuid
+
+from chat import ChatMessage, Role
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS negotiations (
+    id TEXT PRIMARY KEY,
+    vendor TEXT NOT NULL,
+    product TEXT NOT NULL,
+    quoted_price REAL NOT NULL,
+    current_offer REAL,
+    insights TEXT,
+    summary TEXT,
+    summary_covered INTEGER,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS negotiations_vendor ON negotiations (vendor, updated_at);
+CREATE TABLE IF NOT EXISTS turns (
+    negotiation_id TEXT NOT NULL,
+    idx INTEGER NOT NULL,
+    role TEXT NOT NULL,
+    speaker TEXT,
+    text TEXT NOT NULL,
+    offer REAL,
+    created_at REAL NOT NULL,
+    PRIMARY KEY (negotiation_id, idx)
+);
+"""
+
+_STOP = object()
+
+
+def new_negotiation_id():
+    return uuid.uuid4().hex[:12]
+
+
+# Durable record of negotiations: header (selection, current offer, insights report, summary)
+# plus every turn with the price it stated. Writes are queued and applied by a
+# background thread in batched transactions, so recording never blocks a Streamlit rerun;
+# reads (resume, purchase history) use a separate read-only connection, which WAL keeps
+# unblocked by the writer's transactions.
+class NegotiationStore:
+    def __init__(self, path, flush_interval=0.5, batch_size=200):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=10)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        self._lock = threading.Lock()
+        self._reader = sqlite3.connect(
+            pathlib.Path(path).resolve().as_uri() + "?mode=ro", uri=True, check_same_thread=False, timeout=10
+        )
+        self._read_lock = threading.Lock()
+
+        self._queue = queue.Queue()
+        self._writer = threading.Thread(target=self._run, name="negotiation-store", daemon=True)
+        self._writer.start()
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            path=os.getenv("NEGOTIATION_DB_PATH", os.path.join(".cache", "negotiations.sqlite3")),
+            flush_interval=float(os.getenv("NEGOTIATION_FLUSH_SECONDS", "0.5")),
+        )
+
+    # ---- Write-behind queue ----
+
+    def _enqueue(self, sql, params):
+        self._queue.put((sql, params))
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is _STOP:
+                self._queue.task_done()
+                return
+            batch = [item]
+            # Collect whatever else arrives within the flush window into the same transaction
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                try:
+                    item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    self._queue.put(_STOP)
+                    self._queue.task_done()
+                    break
+                batch.append(item)
+            self._write(batch)
+            for _ in batch:
+                self._queue.task_done()
+
+    def _write(self, batch):
+        with self._lock:
+            try:
+                self._conn.execute("BEGIN")
+                for sql, params in batch:
+                    self._conn.execute(sql, params)
+                self._conn.execute("COMMIT")
+            except sqlite3.Error:
+                self._conn.execute("ROLLBACK")
+                # Keep going: a bad batch shouldn't take down persistence for every other session
+                for sql, params in batch:
+                    try:
+                        self._conn.execute(sql, params)
+                    except sqlite3.Error:
+                        pass
+
+    # Block until every queued write has been committed
+    def flush(self):
+        self._queue.join()
+
+    def close(self):
+        self._queue.put(_STOP)
+        self._writer.join()
+        self._reader.close()
+        self._conn.close()
+
+    def record_negotiation(self, negotiation_id, vendor, product, quoted_price):
+        now = time.time()
+        self._enqueue(
+            "INSERT OR IGNORE INTO negotiations (id, vendor, product, quoted_price, current_offer, created_at, updated_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (negotiation_id, vendor, product, float(quoted_price), float(quoted_price), now, now),
+        )
+
+    # Insert or replace turn `idx` (ChatLog index: 1 is the first turn)
+    def record_turn(self, negotiation_id, idx, message, offer=None):
+        now = time.time()
+        self._enqueue(
+            "INSERT OR REPLACE INTO turns (negotiation_id, idx, role, speaker, text, offer, created_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (negotiation_id, idx, message.role.value, message.speaker, message.text, offer, now),
+        )
+        # Buyer turns keep the price they proposed; only the vendor's moves the current offer
+        if offer is not None and message.role == Role.VENDOR:
+            self._enqueue(
+                "UPDATE negotiations SET current_offer = ?, updated_at = ? WHERE id = ?",
+                (float(offer), now, negotiation_id),
+            )
+        else:
+            self._enqueue("UPDATE negotiations SET updated_at = ? WHERE id = ?", (now, negotiation_id))
+
+    def record_insights(self, negotiation_id, report_text):
+        self._enqueue(
+            "UPDATE negotiations SET insights = ?, updated_at = ? WHERE id = ?",
+            (report_text, time.time(), negotiation_id),
+        )
+
+    def record_summary(self, negotiation_id, summary):
+        self._enqueue(
+            "UPDATE negotiations SET summary = ?, summary_covered = ?, updated_at = ? WHERE id = ?",
+            (summary["text"], summary["covered"], time.time(), negotiation_id),
+        )
+
+    # ---- Reads ----
+
+    def _query(self, sql, params):
+        with self._read_lock:
+            return self._reader.execute(sql, params).fetchall()
+
+    # Everything needed to resume a negotiation, or None if the ID is unknown
+    def load(self, negotiation_id):
+        rows = self._query(
+            "SELECT vendor, product, quoted_price, current_offer, insights, summary, summary_covered "
+            "FROM negotiations WHERE id = ?",
+            (negotiation_id,),
+        )
+        if not rows:
+            return None
+        vendor, product, quoted_price, current_offer, insights, summary, summary_covered = rows[0]
+        turns = self._query(
+            "SELECT idx, role, speaker, text, offer, created_at FROM turns WHERE negotiation_id = ? ORDER BY idx",
+            (negotiation_id,),
+        )
+        return {
+            "id": negotiation_id,
+            "vendor": vendor,
+            "product": product,
+            "quoted_price": quoted_price,
+            "current_offer": current_offer,
+            "insights": insights,
+            "summary": {"text": summary, "covered": summary_covered} if summary else None,
+            "turns": [ChatMessage(Role(role), text, speaker) for _, role, speaker, text, _, _ in turns],
+            # (turn index, role, price, timestamp) for every turn that stated a price
+            "offers": [
+                (idx, role, offer, created_at)
+                for idx, role, _, _, offer, created_at in turns if offer is not None
+            ],
+        }
+
+    # Earlier negotiations with `vendor` (newest first): what was quoted and where the vendor ended up
+    def previous_negotiations(self, vendor, exclude_id=None, limit=10):
+        rows = self._query(
+            "SELECT n.updated_at, n.product, n.quoted_price, n.current_offer, "
+            "(SELECT COUNT(*) FROM turns t WHERE t.negotiation_id = n.id) "
+            "FROM negotiations n WHERE n.vendor = ? AND n.id != ? "
+            "AND EXISTS (SELECT 1 FROM turns t WHERE t.negotiation_id = n.id AND t.role = 'buyer') "
+            "ORDER BY n.updated_at DESC LIMIT ?",
+            (vendor, exclude_id or "", limit),
+        )
+        return [
+            {
+                "date": time.strftime("%Y-%m-%d", time.localtime(updated_at)),
+                "product": product,
+                "quoted_price": quoted_price,
+                "final_offer": current_offer,
+                "discount_pct": round((1 - current_offer / quoted_price) * 100, 1) if current_offer and quoted_price else None,
+                "turns": turn_count,
+            }
+            for updated_at, product, quoted_price, current_offer, turn_count in rows
+        ]
@@ -0,0 +1,129 @@
+import json
+from dataclasses import dataclass
+
+# JSON schemas for OpenAI structured outputs (strict mode: every property required, no extras)
+STRATEGY_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "strategy": {"type": "string", "description": "Strategic advice for the buyer's next move"},
+        "message": {"type": "string", "description": "Suggested message for the buyer to send"},
+    },
+    "required": ["strategy", "message"],
+    "additionalProperties": False,
+}
+
+VENDOR_REPLY_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "reply": {"type": "string", "description": "What the vendor says to the buyer"},
+        "offer": {
+            "type": ["number", "null"],
+            "description": "Price the vendor is offering in this reply, or null if none is stated",
+        },
+    },
+    "required": ["reply", "offer"],
+    "additionalProperties": False,
+}
+
+
+def response_format(name, schema):
+    return {"type": "json_schema", "json_schema": {"name": name, "strict": True, "schema": schema}}
+
+
+def _load_object(text):
+    try:
+        data = json.loads(text)
+    except (TypeError, json.JSONDecodeError) as e:
+        raise ValueError(f"Response is not valid JSON: {e}") from None
+    if not isinstance(data, dict):
+        raise ValueError("Response is not a JSON object")
+    return data
+
+
+def _required_text(data, field):
+    value = data.get(field)
+    if not isinstance(value, str) or not value.strip():
+        raise ValueError(f"Response is missing '{field}'")
+    return value.strip()
+
+
+@dataclass(frozen=True)
+class StrategySuggestion:
+    strategy: str
+    message: str
+
+    @classmethod
+    def from_json(cls, text):
+        data = _load_object(text)
+        return cls(strategy=_required_text(data, "strategy"), message=_required_text(data, "message"))
+
+
+@dataclass(frozen=True)
+class VendorReply:
+    reply: str
+    offer: float | None
+
+    @classmethod
+    def from_json(cls, text):
+        data = _load_object(text)
+        offer = data.get("offer")
+        if isinstance(offer, bool) or not isinstance(offer, (int, float)) or offer <= 0:
+            offer = None
+        return cls(reply=_required_text(data, "reply"), offer=float(offer) if offer is not None else None)
+
+
+_ESCAPES = {'"': '"', "\\": "\\", "/": "/", "b": "\b", "f": "\f", "n": "\n", "r": "\r", "t": "\t"}
+
+
+# Decode the (possibly still incomplete) string value of `field` from a partial JSON buffer
+def partial_json_string(buffer, field):
+    key = buffer.find(f'"{field}"')
+    if key == -1:
+        return ""
+    i = key + len(field) + 2
+    while i < len(buffer) and buffer[i] in " \t\r\n:":
+        i += 1
+    if i >= len(buffer) or buffer[i] != '"':
+        return ""
+    i += 1
+
+    out = []
+    while i < len(buffer):
+        ch = buffer[i]
+        if ch == '"':
+            break
+        if ch != "\\":
+            out.append(ch)
+            i += 1
+            continue
+        # Stop before an escape sequence that hasn't fully arrived yet
+        if i + 1 >= len(buffer):
+            break
+        code = buffer[i + 1]
+        if code == "u":
+            if i + 6 > len(buffer):
+                break
+            out.append(chr(int(buffer[i + 2:i + 6], 16)))
+            i += 6
+        else:
+            out.append(_ESCAPES.get(code, code))
+            i += 2
+    return "".join(out)
+
+
+# Wraps a stream of JSON text deltas and yields only the growing text of one string field,
+# so a structured response can be rendered token by token. The full JSON is kept in `buffer`.
+class JsonFieldStream:
+    def __init__(self, deltas, field):
+        self.deltas = deltas
+        self.field = field
+        self.buffer = ""
+
+    def __iter__(self):
+        emitted = 0
+        for delta in self.deltas:
+            self.buffer += delta
+            text = partial_json_string(self.buffer, self.field)
+            if len(text) > emitted:
+                yield text[emitted:]
+                emitted = len(text)
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Tests import the app's modules from the repository root, like the benchmarks do
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
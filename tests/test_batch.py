@@ -0,0 +1,55 @@
+import json
+
+from batch import DEAL, NO_DEAL, run_negotiation
+from llm import Completion, DeltaStream, LLMClient
+
+
+# Backend whose vendor never moves off `vendor_offer` and whose buyer always asks for `buyer_offer`
+class StubBackend:
+    def __init__(self, vendor_offer, buyer_offer):
+        self.vendor_offer = vendor_offer
+        self.buyer_offer = buyer_offer
+
+    def _text(self, task):
+        if task == "strategy":
+            return json.dumps({"strategy": "Hold firm.", "message": f"Could you do ${self.buyer_offer}?"})
+        if task == "vendor_reply":
+            return json.dumps({"reply": f"Sorry, ${self.vendor_offer} is firm.", "offer": self.vendor_offer})
+        return "summary"
+
+    def complete(self, task, messages, **kwargs):
+        return Completion(text=self._text(task), model="stub")
+
+    def open_stream(self, task, messages, **kwargs):
+        stream = DeltaStream(model="stub")
+        stream.deltas = iter([self._text(task)])
+        return stream
+
+
+def negotiate(vendor_offer, buyer_offer, target_price=None, max_turns=8):
+    client = LLMClient(StubBackend(vendor_offer, buyer_offer), requests_per_minute=None, tokens_per_minute=None)
+    job = {"vendor": "Microsoft", "product": "Surface", "quoted_price": 1500.0, "target_price": target_price}
+    return run_negotiation(client, job, max_turns=max_turns, stall_turns=2)
+
+
+def test_stalled_negotiation_without_target_is_no_deal():
+    record = negotiate(vendor_offer=1500, buyer_offer=1000)
+    assert record["error"] is None
+    assert record["status"] == NO_DEAL
+    assert record["turns"] == 2
+
+
+def test_running_out_of_turns_is_no_deal():
+    record = negotiate(vendor_offer=1500, buyer_offer=1000, max_turns=1)
+    assert record["status"] == NO_DEAL
+
+
+def test_vendor_meeting_the_buyer_is_a_deal():
+    record = negotiate(vendor_offer=1400, buyer_offer=1400)
+    assert record["status"] == DEAL
+    assert record["turns"] == 1
+
+
+def test_vendor_reaching_the_target_is_a_deal():
+    record = negotiate(vendor_offer=1400, buyer_offer=1000, target_price=1450)
+    assert record["status"] == DEAL
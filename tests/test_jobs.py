@@ -0,0 +1,17 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from jobs import DONE, FAILED, JobQueue
+
+
+def fail(job):
+    raise RuntimeError("boom")
+
+
+def test_finished_jobs_have_finished_at():
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        jobs = JobQueue(executor)
+        done = jobs.submit("ok", lambda job: 42)
+        failed = jobs.submit("bad", fail)
+    assert done.status == DONE and done.result == 42
+    assert failed.status == FAILED
+    assert done.finished_at is not None and failed.finished_at is not None
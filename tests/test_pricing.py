@@ -0,0 +1,21 @@
+import pytest
+
+from pricing import extract_buyer_offer
+
+# (buyer message, price it proposes or None)
+BUYER_MESSAGES = [
+    ("Your competitor sells it for $1,600 - can you match $1,300?", 1300),
+    ("Could you do $1,200?", 1200),
+    ("Can you do it for $1,150 if we order today?", 1150),
+    ("We paid $900 last year, so $950 works for us.", 950),
+    ("Your price of $1,500 is too high. How about $1,320?", 1320),
+    ("They quoted us $1,180; I'd pay $1,250 to stay with you.", 1250),
+    ("OK, $0.70 a bar?", 0.70),
+    ("That's more than we budgeted for.", None),
+]
+
+
+@pytest.mark.parametrize("message, expected", BUYER_MESSAGES)
+def test_extracts_buyer_proposal(message, expected):
+    match = extract_buyer_offer(message)
+    assert (match.value if match else None) == expected
@@ -0,0 +1,25 @@
+import pytest
+
+from vendor_engine import VendorEngine
+
+
+@pytest.mark.parametrize("buyer_offer", [1300, 1460, 1600, 3900])
+def test_accepting_a_bid_never_raises_the_offer(buyer_offer):
+    decision = VendorEngine().decide("Apple", "MacBook", 1500, 1460, buyer_offer, turn=3)
+    assert decision.offer <= 1460
+
+
+def test_bid_above_the_standing_offer_closes_at_the_standing_offer():
+    decision = VendorEngine().decide("Apple", "MacBook", 1500, 1460, 1600, turn=3)
+    assert decision.accepted
+    assert decision.offer == 1460
+    assert "$1,460" in decision.reply
+
+
+def test_offer_never_goes_up_over_a_negotiation():
+    engine = VendorEngine()
+    current = 1500.0
+    for turn, bid in enumerate([1000, 1600, 1100, None, 3900, 1200, 1250], start=1):
+        decision = engine.decide("Dell", "XPS 13", 1500, current, bid, turn)
+        assert decision.offer <= current
+        current = decision.offer
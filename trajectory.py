@@ -0,0 +1,108 @@
+import time
+from dataclasses import dataclass
+
+from pricing import format_price
+
+BUYER, VENDOR = "buyer", "vendor"
+
+
+@dataclass(frozen=True, slots=True)
+class OfferPoint:
+    turn: int
+    speaker: str
+    price: float
+    timestamp: float
+
+
+# Every price either side put on the table, in order, with running concession statistics.
+# Each append updates the aggregates in O(1), so reading them on a rerun costs nothing.
+class OfferTrajectory:
+    def __init__(self, quoted_price):
+        self.quoted_price = float(quoted_price)
+        self.points = []
+        self.last = {BUYER: None, VENDOR: None}
+        # Number of moves and total movement towards the other side, per speaker
+        self.moves = {BUYER: 0, VENDOR: 0}
+        self.movement = {BUYER: 0.0, VENDOR: 0.0}
+
+    def append(self, turn, speaker, price, timestamp=None):
+        price = float(price)
+        previous = self.last[speaker]
+        if previous is not None:
+            # Vendors concede by going down, buyers by going up
+            step = previous - price if speaker == VENDOR else price - previous
+            self.moves[speaker] += 1
+            self.movement[speaker] += step
+        self.last[speaker] = price
+        point = OfferPoint(turn, speaker, price, time.time() if timestamp is None else timestamp)
+        self.points.append(point)
+        return point
+
+    def __len__(self):
+        return len(self.points)
+
+    # Average concession per move (vendor: price drop, buyer: price raise), or None before a second offer
+    def concession_rate(self, speaker):
+        return self.movement[speaker] / self.moves[speaker] if self.moves[speaker] else None
+
+    # Vendor's total discount off the quoted price, in percent
+    @property
+    def discount_pct(self):
+        current = self.last[VENDOR]
+        if current is None or not self.quoted_price:
+            return 0.0
+        return (1 - current / self.quoted_price) * 100
+
+    @property
+    def gap(self):
+        if self.last[VENDOR] is None or self.last[BUYER] is None:
+            return None
+        return self.last[VENDOR] - self.last[BUYER]
+
+    # Where and in how many more rounds the two sides meet if both keep conceding at their
+    # average rate: (rounds, price), or None while there isn't enough movement to project
+    def projected_convergence(self):
+        gap = self.gap
+        if gap is None:
+            return None
+        if gap <= 0:
+            return 0.0, self.last[VENDOR]
+        vendor_rate = max(self.concession_rate(VENDOR) or 0.0, 0.0)
+        buyer_rate = max(self.concession_rate(BUYER) or 0.0, 0.0)
+        if vendor_rate + buyer_rate <= 0:
+            return None
+        rounds = gap / (vendor_rate + buyer_rate)
+        return rounds, self.last[VENDOR] - vendor_rate * rounds
+
+    # Points as plain dicts for charts and tables
+    def records(self):
+        return [{"turn": p.turn, "speaker": p.speaker, "price": p.price} for p in self.points]
+
+    # Precomputed price movement for the summary prompt
+    def describe(self):
+        if not self.points:
+            return "No prices have been stated yet."
+        lines = [
+            "Offers in order: " + ", ".join(f"{p.speaker} {format_price(p.price)}" for p in self.points),
+            f"Quoted price: {format_price(self.quoted_price)}",
+        ]
+        if self.last[VENDOR] is not None:
+            lines.append(
+                f"Vendor's current offer: {format_price(round(self.last[VENDOR], 2))} "
+                f"({self.discount_pct:.1f}% below the quote)"
+            )
+        if self.last[BUYER] is not None:
+            lines.append(f"Buyer's latest offer: {format_price(round(self.last[BUYER], 2))}")
+        for speaker in (VENDOR, BUYER):
+            rate = self.concession_rate(speaker)
+            if rate is not None:
+                sign = "-" if rate < 0 else ""
+                lines.append(f"{speaker.capitalize()} concession rate: {sign}{format_price(round(abs(rate), 2))} per move")
+        projection = self.projected_convergence()
+        if projection is not None:
+            rounds, price = projection
+            lines.append(
+                "The offers have met." if rounds == 0 else
+                f"Projected convergence: about {format_price(round(price, 2))} in {rounds:.1f} more round(s)"
+            )
+        return "\n".join(lines)
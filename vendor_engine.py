@@ -0,0 +1,124 @@
+import math
+import os
+import random
+import zlib
+from dataclasses import dataclass
+
+from pricing import format_price
+
+# "fallback": the LLM writes vendor replies and the engine stands in when a call fails.
+# "practice": the engine answers every turn locally, no LLM calls.
+# "hybrid": the engine decides the price and the LLM only words the reply around it.
+MODES = ("fallback", "practice", "hybrid")
+
+COUNTERS = (
+    "I hear you. The best I can do right now is {price}.",
+    "That's a bit low for us, but I can come down to {price}.",
+    "We want your business - how about {price}?",
+    "Let me meet you partway: {price}, and that's a real stretch for us.",
+)
+NO_PRICE_COUNTERS = (
+    "I can sharpen the pencil a little - {price} is where I can go.",
+    "If it helps get this done, I can do {price}.",
+    "Let me see... I could move to {price} for you.",
+)
+HOLDS = (
+    "I'm afraid {price} is as low as I can go on this one.",
+    "Honestly, {price} is our floor - I can't go lower without losing money.",
+    "I've already given you my best number: {price}.",
+)
+ACCEPTS = (
+    "You drive a hard bargain - {price} works for us. Deal!",
+    "Alright, we can do {price}. Let's get the paperwork started.",
+    "{price} it is. Thanks for working with us on this.",
+)
+
+
+# Vendor's private negotiating stance for one product: the lowest price it will accept, the share
+# of the remaining gap it gives up per turn, and how much a lowball anchor slows it down
+@dataclass(frozen=True)
+class VendorPersona:
+    reservation_price: float
+    concession_rate: float
+    anchor_resistance: float
+
+
+@dataclass(frozen=True)
+class VendorDecision:
+    offer: float
+    accepted: bool
+    reply: str
+
+
+# Nearest "sayable" price: whole $5 steps from $100 up, cents below
+def round_price(value, quoted_price):
+    return round(value / 5) * 5 if quoted_price >= 100 else round(value, 2)
+
+
+def _round_up(value, quoted_price):
+    return math.ceil(value / 5) * 5 if quoted_price >= 100 else math.ceil(value * 100) / 100
+
+
+# Local vendor negotiator: a time-dependent concession curve anchored at the quoted price.
+# Each turn the vendor concedes `concession_rate` of the gap between its current offer and
+# max(reservation, buyer's offer), shrinking with every turn (Boulware-style), halved when the
+# buyer names no price and slowed further the deeper a buyer's offer sits below the reservation
+# price. A buyer offer that meets the next counter, or clears the reservation price within 1% of
+# it, is accepted (at no more than the standing offer). Personas are derived from the vendor/product pair, so a negotiation plays out
+# the same way on every run.
+class VendorEngine:
+    def __init__(self, mode="fallback", min_discount=0.08, max_discount=0.2):
+        if mode not in MODES:
+            raise ValueError(f"Unknown vendor engine mode {mode!r}; expected one of {', '.join(MODES)}")
+        self.mode = mode
+        self.min_discount = min_discount
+        self.max_discount = max_discount
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            mode=os.getenv("VENDOR_ENGINE_MODE", "fallback").lower(),
+            min_discount=float(os.getenv("VENDOR_ENGINE_MIN_DISCOUNT", "0.08")),
+            max_discount=float(os.getenv("VENDOR_ENGINE_MAX_DISCOUNT", "0.2")),
+        )
+
+    def persona(self, vendor, product, quoted_price):
+        rng = random.Random(zlib.crc32(f"{vendor}|{product}|{quoted_price}".encode("utf-8")))
+        return VendorPersona(
+            reservation_price=quoted_price * (1 - rng.uniform(self.min_discount, self.max_discount)),
+            concession_rate=rng.uniform(0.25, 0.45),
+            anchor_resistance=rng.uniform(1.0, 2.5),
+        )
+
+    # The vendor's move on `turn` (1 = first reply) given its standing offer and the buyer's number
+    def decide(self, vendor, product, quoted_price, current_offer, buyer_offer, turn):
+        quoted_price = float(quoted_price)
+        current_offer = float(current_offer or quoted_price)
+        persona = self.persona(vendor, product, quoted_price)
+        floor = persona.reservation_price
+
+        rate = persona.concession_rate / (1 + 0.15 * max(0, turn - 1))
+        if buyer_offer is None:
+            target = floor
+            rate *= 0.5
+        else:
+            target = max(floor, buyer_offer)
+            if buyer_offer < floor:
+                rate *= max(0.4, 1 - persona.anchor_resistance * (floor - buyer_offer) / quoted_price)
+
+        counter = round_price(current_offer - (current_offer - target) * rate, quoted_price)
+        counter = min(current_offer, max(counter, _round_up(floor, quoted_price)))
+        pick = zlib.crc32(f"{vendor}|{product}|{turn}".encode("utf-8"))
+
+        closing = buyer_offer is not None and (
+            buyer_offer >= counter or (buyer_offer >= floor and counter - buyer_offer <= quoted_price * 0.01)
+        )
+        if closing:
+            # A bid above the standing offer is accepted at the standing offer, never raised to
+            offer, templates, accepted = min(buyer_offer, current_offer), ACCEPTS, True
+        elif counter >= current_offer:
+            offer, templates, accepted = current_offer, HOLDS, False
+        else:
+            offer, templates, accepted = counter, COUNTERS if buyer_offer is not None else NO_PRICE_COUNTERS, False
+        reply = templates[pick % len(templates)].format(price=format_price(offer))
+        return VendorDecision(offer=offer, accepted=accepted, reply=reply)